@@ -0,0 +1,51 @@
+export async function POST(request) {
+  try {
+    const body = await request.json();
+    const { username } = body;
+
+    if (!username || typeof username !== "string") {
+      return Response.json(
+        { success: false, error: "Username is required" },
+        { status: 400 }
+      );
+    }
+
+    console.log(`Streaming analysis for GitHub user: ${username}`);
+
+    // Get the agents service URL from environment (supports Docker and production)
+    const agentsUrl = process.env.AGENTS_URL || "https://hacksy.onrender.com";
+
+    const response = await fetch(`${agentsUrl}/analyze/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({
+        username,
+        agent: "hackathon_recommender"
+      }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Agents service error: ${response.status}`);
+    }
+
+    // Relay the Server-Sent Events as they arrive
+    return new Response(response.body, {
+      headers: {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+      },
+    });
+
+  } catch (error) {
+    console.error("API Error:", error);
+    return Response.json(
+      {
+        success: false,
+        error: "Internal server error. Please check the logs for details.",
+      },
+      { status: 500 }
+    );
+  }
+}
@@ -38,20 +38,39 @@ export default function Home() {
     setProfileData(null);
 
     try {
-      const response = await fetch('/api/analyze', {
+      const response = await fetch('/api/analyze/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ username: username.trim() }),
       });
 
-      const data = await response.json();
-
-      if (!response.ok || !data.success) {
+      if (!response.ok) {
+        const data = await response.json();
         throw new Error(data.error || 'Analysis failed');
       }
 
-      setResult(data.recommendations);
-      setProfileData(data.profile);
+      // Server-Sent Events: profile first, then recommendation chunks, then done or error
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+          if (event === 'profile') {
+            setProfileData(data);
+          } else if (event === 'chunk') {
+            setResult((previous) => previous + data.text);
+          } else if (event === 'error') {
+            throw new Error(data.error || 'Analysis failed');
+          }
+        }
+      }
     } catch (err) {
       setError(err.message);
     } finally {
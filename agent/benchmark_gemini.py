@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Gemini client concurrency benchmark for Hacksy
+Runs N concurrent generations against a local stand-in for the Gemini REST API
+with a fixed latency, first as blocking HTTP calls in asyncio.to_thread (how the
+SDK client used to be driven), then with the async AIAgentClient.
+
+Usage:
+    python benchmark_gemini.py --concurrency 200 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import requests
+from aiohttp import web
+
+from main import AIAgentClient
+
+logger = logging.getLogger("benchmark")
+
+PORT = 8765
+
+
+async def start_fake_gemini(latency: float) -> web.AppRunner:
+    """Serve generateContent with a fixed delay, like a slow model"""
+    async def generate(request):
+        await asyncio.sleep(latency)
+        return web.json_response({"candidates": [{"content": {"parts": [{"text": "ok"}]}}]})
+
+    app = web.Application()
+    app.router.add_post("/v1beta/models/{model}:generateContent", generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+    return runner
+
+
+def blocking_generate(base_url: str) -> str:
+    response = requests.post(f"{base_url}/models/gemini-1.5-flash:generateContent",
+                             json={"contents": [{"parts": [{"text": "hi"}]}]}, timeout=60)
+    return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+
+
+async def measure(name: str, calls) -> None:
+    peak_threads = threading.active_count()
+    done = asyncio.Event()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample_threads())
+    started = time.monotonic()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    elapsed = time.monotonic() - started
+    done.set()
+    await sampler
+    failures = sum(isinstance(result, Exception) for result in results)
+    logger.info(f"{name}: {len(results)} generations in {elapsed:.2f}s "
+                f"({len(results) / elapsed:.1f}/s), {failures} failed, peak threads {peak_threads}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare thread-backed and async Gemini calls under concurrency")
+    parser.add_argument("--concurrency", type=int, default=200, help="generations started at once")
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds the fake model takes per generation")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{PORT}/v1beta"
+    runner = await start_fake_gemini(args.latency)
+    logger.info(f"Default executor size: {min(32, (os.cpu_count() or 1) + 4)} threads")
+    try:
+        await measure("asyncio.to_thread + blocking HTTP",
+                      [asyncio.to_thread(blocking_generate, base_url) for _ in range(args.concurrency)])
+
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        client = AIAgentClient("", config={"base_url": base_url, "pool_size": args.concurrency})
+        await client.start()
+        try:
+            await measure("AIAgentClient (async REST)",
+                          [client._call_gemini("hi", 0.7, 100) for _ in range(args.concurrency)])
+        finally:
+            await client.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,16 +8,40 @@ import os
 import logging
 import aiohttp
 import asyncio
+import fcntl
+import hashlib
+import heapq
+import itertools
 import json
+import mmap
 import random
-from typing import Dict, Any, List, Optional
+import re
+import secrets
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from contextlib import aclosing, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 import yaml
-from fastapi import FastAPI
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
-import google.generativeai as genai
+
+try:
+    # Faster decoding straight from response bytes when available
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(value: Any) -> bytes:
+        return json.dumps(value).encode()
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +54,7 @@ logger = logging.getLogger(__name__)
 class AnalysisRequest(BaseModel):
     username: str
     agent: str = "hackathon_recommender"
+    fresh: bool = False  # bypass cached recommendations and generate new ones
 
 class AnalysisResponse(BaseModel):
     success: bool
@@ -37,6 +62,9 @@ class AnalysisResponse(BaseModel):
     recommendations: Optional[str] = None
     profile: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    error_code: Optional[str] = None  # "timeout" when the request ran past timeout_seconds
+    stale: bool = False  # served from expired cache entries while a refresh runs
+    age_seconds: Optional[float] = None  # age of the oldest cached part when stale
 
 class HealthResponse(BaseModel):
     status: str
@@ -68,105 +96,1746 @@ class AgentConfig:
             }
             self.config = {}
 
+# Upper bounds (seconds) of the entry-age histogram buckets in cache stats
+CACHE_AGE_BUCKETS = [(60, "<1m"), (300, "<5m"), (900, "<15m"), (3600, "<1h"), (21600, "<6h"), (86400, "<1d")]
+
+def age_histogram(stored_ats, now: float) -> Dict[str, int]:
+    """Count entries per age bucket"""
+    histogram = {label: 0 for _, label in CACHE_AGE_BUCKETS}
+    histogram[">=1d"] = 0
+    for stored_at in stored_ats:
+        age = now - stored_at
+        label = next((label for bound, label in CACHE_AGE_BUCKETS if age < bound), ">=1d")
+        histogram[label] += 1
+    return histogram
+
+def hit_ratio(hits: int, stale_hits: int, misses: int) -> Optional[float]:
+    lookups = hits + stale_hits + misses
+    return round(hits / lookups, 4) if lookups else None
+
+# Typical profile, encoded into the default compression dictionary so field names
+# and the usual categorical values are already known to zlib
+DICTIONARY_SAMPLE_PROFILE = {
+    "username": "", "name": "", "bio": "", "repos": 0, "followers": 0, "following": 0,
+    "languages": ["Python", "JavaScript", "TypeScript", "Go", "Java", "Rust", "C++", "Shell", "HTML", "CSS"],
+    "company": "", "location": "", "created_at": "2020-01-01T00:00:00Z", "repository_count": 0, "recent_repos": [],
+    "repo_analysis": {"total_stars": 0, "total_forks": 0, "avg_complexity": "intermediate",
+                      "popular_topics": ["machine-learning", "web", "api", "react", "python"],
+                      "frameworks_used": ["Frontend Framework", "Backend Framework"],
+                      "project_types": ["AI/ML", "API Development", "Mobile Development", "Game Development"],
+                      "recent_activity": True},
+    "activity_analysis": {"recent_activity_score": 0, "activity_type": "very_active", "preferred_days": [],
+                          "commit_frequency": "weekly", "collaboration_level": "collaborative"},
+    "expertise_level": "advanced",
+    "preferred_domains": ["Data Science & AI", "Web Development", "DevOps & Infrastructure"],
+    "collaboration_style": "collaborative", "recent_activity_score": 0, "technology_diversity": 0,
+    "project_complexity_preference": "intermediate",
+}
+
+class CacheCodec:
+    """Compact binary encoding for cache values: JSON deflated with a preset dictionary.
+
+    Profiles and recommendation texts repeat the same field names and section
+    headers, so seeding zlib with them shrinks even a single small entry. Each
+    blob starts with the codec id, and a blob from another dictionary fails to decode.
+    """
+
+    ID = struct.Struct("<I")
+
+    def __init__(self, level: int = 6, dictionary: bytes = b""):
+        self.level = level
+        # zlib only looks back 32KB, so only the tail of a larger dictionary is usable
+        self.dictionary = dictionary[-32768:]
+        self.id = zlib.crc32(self.dictionary, zlib.crc32(b"zlib")) or 1
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], samples: List[str]) -> Optional["CacheCodec"]:
+        """Codec from cache.compression settings, seeded with sample text when no dictionary file is given"""
+        if not config.get('enabled', True):
+            return None
+        dictionary = "\n".join(samples).encode()
+        if config.get('dictionary_path'):
+            try:
+                with open(config['dictionary_path'], 'rb') as f:
+                    dictionary = f.read()
+            except OSError as e:
+                logger.error(f"Failed to read compression dictionary {config['dictionary_path']}: {e}")
+        return cls(level=config.get('level', 6), dictionary=dictionary)
+
+    def encode(self, value: Any) -> bytes:
+        if self.dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return self.ID.pack(self.id) + compressor.compress(json_dumps(value)) + compressor.flush()
+
+    def decode(self, blob: bytes) -> Any:
+        """Inverse of encode; raises ValueError for blobs written by a different codec"""
+        if len(blob) < self.ID.size or self.ID.unpack_from(blob)[0] != self.id:
+            raise ValueError("cache entry was encoded with a different codec")
+        decompressor = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+        return json_loads(decompressor.decompress(memoryview(blob)[self.ID.size:]) + decompressor.flush())
+
+class MemoryCache:
+    """Bounded in-process LRU cache with per-entry expiry.
+
+    Expired entries are kept for `max_stale` more seconds so stale-while-revalidate
+    callers can still read them.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 600, max_stale: float = 0,
+                 codec: Optional[CacheCodec] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stale = max_stale
+        # Values are held encoded when set, trading a decode per hit for memory
+        self.codec = codec
+        # key -> (expires_at, stored_at, value)
+        self.entries: "OrderedDict[str, Tuple[float, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Tuple[float, Any, bool]]:
+        """Return (stored_at, value, stale) for a usable entry, or None"""
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] + self.max_stale <= now:
+            del self.entries[key]
+            entry = None
+        stale = entry is not None and entry[0] <= now
+        if entry is None or (stale and not allow_stale):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry[1], self.codec.decode(entry[2]) if self.codec else entry[2], stale
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None, expires_at: Optional[float] = None):
+        now = time.time()
+        if self.codec:
+            value = self.codec.encode(value)
+        self.entries[key] = (expires_at or now + self.ttl, stored_at or now, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every entry whose key starts with prefix; '' flushes the cache"""
+        keys = [key for key in self.entries if key.startswith(prefix)]
+        for key in keys:
+            del self.entries[key]
+        return len(keys)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "bytes": sum(len(entry[2]) if self.codec else len(json.dumps(entry[2], default=str))
+                         for entry in self.entries.values()),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": hit_ratio(self.hits, self.stale_hits, self.misses),
+            "evictions": self.evictions,
+            "age_histogram": age_histogram((entry[1] for entry in self.entries.values()), now),
+        }
+
+class SQLiteCache:
+    """Persistent cache tier in SQLite (WAL mode) that survives restarts"""
+
+    def __init__(self, path: str, ttl: float = 86400, table: str = "cache", max_stale: float = 0,
+                 codec: Optional[CacheCodec] = None):
+        self.path = path
+        # Rows are JSON text without a codec, encoded blobs with one
+        self.codec = codec
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.table = table
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            self.conn.execute(f"DELETE FROM {table} WHERE stored_at < ?", (time.time() - ttl - max_stale,))
+            self.conn.commit()
+
+    def _get(self, key: str, allow_stale: bool) -> Optional[Tuple[float, Any, bool]]:
+        oldest = time.time() - self.ttl - (self.max_stale if allow_stale else 0)
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT stored_at, value FROM {self.table} WHERE key = ? AND stored_at >= ?",
+                (key, oldest)).fetchone()
+        value = None
+        if row is not None:
+            try:
+                value = self._decode(row[1])
+            except (ValueError, zlib.error):
+                # Written under other compression settings; treat as absent
+                row = None
+        if row is None:
+            self.misses += 1
+            return None
+        stale = row[0] < time.time() - self.ttl
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return row[0], value, stale
+
+    def _decode(self, raw) -> Any:
+        if isinstance(raw, str):
+            return json.loads(raw)
+        if self.codec is None:
+            raise ValueError("compressed cache entry without a codec")
+        return self.codec.decode(raw)
+
+    def _set(self, key: str, value: Any, stored_at: float):
+        raw = self.codec.encode(value) if self.codec else json.dumps(value)
+        with self.lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, raw, stored_at))
+            self.conn.commit()
+
+    def _delete(self, key: str):
+        with self.lock:
+            self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def _delete_prefix(self, prefix: str) -> int:
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        with self.lock:
+            removed = self.conn.execute(
+                f"DELETE FROM {self.table} WHERE key LIKE ? ESCAPE '\\'", (pattern,)).rowcount
+            self.conn.commit()
+        return removed
+
+    def _stats(self) -> Dict[str, Any]:
+        with self.lock:
+            entries, size = self.conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM {self.table}").fetchone()
+            stored_ats = [row[0] for row in self.conn.execute(f"SELECT stored_at FROM {self.table}")]
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": hit_ratio(self.hits, self.stale_hits, self.misses),
+            # Expired rows are only removed on startup or overwrite
+            "evictions": 0,
+            "age_histogram": age_histogram(stored_ats, time.time()),
+        }
+
+    async def get(self, key: str, allow_stale: bool = False) -> Optional[Tuple[float, Any, bool]]:
+        """Return (stored_at, value, stale) for a usable row, or None"""
+        return await asyncio.to_thread(self._get, key, allow_stale)
+
+    async def set(self, key: str, value: Any, stored_at: Optional[float] = None):
+        await asyncio.to_thread(self._set, key, value, stored_at or time.time())
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        return await asyncio.to_thread(self._delete_prefix, prefix)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._stats)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class SharedMemoryCache:
+    """Cache tier in a memory-mapped file shared by every worker process.
+
+    The file holds a fixed number of fixed-size slots grouped into buckets of
+    WAYS slots; a key can only live in its own bucket, and a full bucket evicts
+    its least recently used slot. Writers and readers serialize on an flock of
+    the file, so any process mapping the same path sees the same entries.
+    """
+
+    MAGIC = b"HACKSYC1"
+    WAYS = 8
+    HEADER = struct.Struct("<8sIII")    # magic, slots, slot_size, codec id
+    SLOT = struct.Struct("<QddII")      # key hash, stored_at, last_used, key length, value length
+
+    def __init__(self, path: str, slots: int = 2048, slot_size: int = 16384, ttl: float = 86400,
+                 max_stale: float = 0, codec: Optional[CacheCodec] = None):
+        self.path = path
+        self.codec = codec
+        self.buckets = max(1, slots // self.WAYS)
+        self.slots = self.buckets * self.WAYS
+        self.slot_size = slot_size
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+        # flock does not serialize threads sharing one descriptor
+        self.lock = threading.Lock()
+        size = self.HEADER.size + self.slots * slot_size
+        self.fd = self._open(size, self.HEADER.pack(self.MAGIC, self.slots, slot_size, codec.id if codec else 0))
+        self.map = mmap.mmap(self.fd, size)
+
+    def _open(self, size: int, header: bytes) -> int:
+        """Open the file at path, replacing it if its layout or encoding differs.
+
+        A mismatched file is never truncated in place, since other processes may
+        still have it mapped (and would fault on the missing pages); a fresh file
+        is renamed over it instead and they keep their old copy until restarted.
+        """
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            keep = False
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    try:
+                        current = os.stat(self.path).st_ino == os.fstat(fd).st_ino
+                    except FileNotFoundError:
+                        current = False
+                    if not current:
+                        # Replaced by another process while we waited for the lock
+                        continue
+                    existing = os.pread(fd, len(header), 0)
+                    if not existing:
+                        # Brand new file, not mapped by anyone yet
+                        os.ftruncate(fd, size)
+                        os.pwrite(fd, header, 0)
+                    elif existing != header:
+                        self._replace(size, header)
+                        continue
+                    keep = True
+                    return fd
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                if not keep:
+                    os.close(fd)
+
+    def _replace(self, size: int, header: bytes):
+        """Atomically put an empty file with the given header at path"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        tmp = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(tmp, size)
+            os.pwrite(tmp, header, 0)
+        finally:
+            os.close(tmp)
+        os.replace(tmp_path, self.path)
+        logger.warning(f"Shared cache {self.path} had a different layout or encoding; replaced it with an empty one")
+
+    @contextmanager
+    def _locked(self):
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        # Stable across processes, unlike hash(); zero marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') or 1
+
+    def _offsets(self, key_hash: int):
+        first = (key_hash % self.buckets) * self.WAYS
+        return [self.HEADER.size + (first + way) * self.slot_size for way in range(self.WAYS)]
+
+    def _find(self, key: bytes, key_hash: int) -> Optional[int]:
+        for offset in self._offsets(key_hash):
+            slot_hash, _, _, key_length, _ = self.SLOT.unpack_from(self.map, offset)
+            start = offset + self.SLOT.size
+            if slot_hash == key_hash and self.map[start:start + key_length] == key:
+                return offset
+        return None
+
+    def _get(self, key: str, allow_stale: bool) -> Optional[Tuple[float, Any, bool]]:
+        encoded = key.encode()
+        now = time.time()
+        oldest = now - self.ttl - (self.max_stale if allow_stale else 0)
+        with self._locked():
+            offset = self._find(encoded, self._hash(encoded))
+            if offset is not None:
+                slot_hash, stored_at, _, key_length, value_length = self.SLOT.unpack_from(self.map, offset)
+                if stored_at >= oldest:
+                    self.SLOT.pack_into(self.map, offset, slot_hash, stored_at, now, key_length, value_length)
+                    start = offset + self.SLOT.size + key_length
+                    value = self.map[start:start + value_length]
+                else:
+                    offset = None
+        if offset is None:
+            self.misses += 1
+            return None
+        stale = stored_at < now - self.ttl
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return stored_at, self.codec.decode(value) if self.codec else json.loads(value), stale
+
+    def _set(self, key: str, value: Any, stored_at: float):
+        encoded = key.encode()
+        data = self.codec.encode(value) if self.codec else json_dumps(value)
+        if self.SLOT.size + len(encoded) + len(data) > self.slot_size:
+            self.oversized += 1
+            logger.debug(f"Skipping shared cache entry {key}: {len(data)} bytes exceeds slot size {self.slot_size}")
+            return
+        key_hash = self._hash(encoded)
+        with self._locked():
+            offset = self._find(encoded, key_hash)
+            if offset is None:
+                # Reuse an empty slot, else evict the bucket's least recently used one
+                slots = [(self.SLOT.unpack_from(self.map, candidate), candidate) for candidate in self._offsets(key_hash)]
+                empty = [candidate for header, candidate in slots if header[0] == 0]
+                if empty:
+                    offset = empty[0]
+                else:
+                    offset = min(slots, key=lambda slot: slot[0][2])[1]
+                    self.evictions += 1
+            start = offset + self.SLOT.size
+            self.map[start:start + len(encoded) + len(data)] = encoded + data
+            self.SLOT.pack_into(self.map, offset, key_hash, stored_at, time.time(), len(encoded), len(data))
+
+    def _delete(self, key: str):
+        encoded = key.encode()
+        with self._locked():
+            offset = self._find(encoded, self._hash(encoded))
+            if offset is not None:
+                self.SLOT.pack_into(self.map, offset, 0, 0.0, 0.0, 0, 0)
+
+    def _occupied(self):
+        """Yield (offset, stored_at, key_length, value_length) for used slots; caller holds the lock"""
+        for slot in range(self.slots):
+            offset = self.HEADER.size + slot * self.slot_size
+            slot_hash, stored_at, _, key_length, value_length = self.SLOT.unpack_from(self.map, offset)
+            if slot_hash:
+                yield offset, stored_at, key_length, value_length
+
+    def _delete_prefix(self, prefix: str) -> int:
+        encoded = prefix.encode()
+        removed = 0
+        with self._locked():
+            for offset, _, key_length, _ in list(self._occupied()):
+                start = offset + self.SLOT.size
+                if self.map[start:start + key_length].startswith(encoded):
+                    self.SLOT.pack_into(self.map, offset, 0, 0.0, 0.0, 0, 0)
+                    removed += 1
+        return removed
+
+    def _stats(self) -> Dict[str, Any]:
+        with self._locked():
+            occupied = list(self._occupied())
+        return {
+            "entries": len(occupied),
+            "max_entries": self.slots,
+            "bytes": sum(key_length + value_length for _, _, key_length, value_length in occupied),
+            # Counters are per process; the entries are shared by every worker
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": hit_ratio(self.hits, self.stale_hits, self.misses),
+            "evictions": self.evictions,
+            "oversized": self.oversized,
+            "age_histogram": age_histogram((stored_at for _, stored_at, _, _ in occupied), time.time()),
+        }
+
+    async def get(self, key: str, allow_stale: bool = False) -> Optional[Tuple[float, Any, bool]]:
+        """Return (stored_at, value, stale) for a usable slot, or None"""
+        return await asyncio.to_thread(self._get, key, allow_stale)
+
+    async def set(self, key: str, value: Any, stored_at: Optional[float] = None):
+        await asyncio.to_thread(self._set, key, value, stored_at or time.time())
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        return await asyncio.to_thread(self._delete_prefix, prefix)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._stats)
+
+    def close(self):
+        with self.lock:
+            self.map.close()
+            os.close(self.fd)
+
+class TieredCache:
+    """In-process LRU in front of an optional persistent tier (SQLite or shared memory)"""
+
+    def __init__(self, memory: MemoryCache, persistent: Optional[Union[SQLiteCache, "SharedMemoryCache"]] = None):
+        self.memory = memory
+        self.persistent = persistent
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], table: str, max_stale: float = 0,
+                    codec: Optional[CacheCodec] = None) -> "TieredCache":
+        shared = bool(config.get('shared_path'))
+        memory = MemoryCache(
+            max_entries=config.get('memory_entries', 1000),
+            # Behind a shared tier, keep local copies briefly so other workers' writes
+            # and invalidations show through; stale reads come from the shared tier
+            ttl=config.get('shared_memory_ttl', 5) if shared else config.get('memory_ttl', 600),
+            max_stale=0 if shared else max_stale,
+            codec=codec,
+        )
+        persistent = None
+        if shared:
+            try:
+                persistent = SharedMemoryCache(f"{config['shared_path']}.{table}",
+                                               slots=config.get('shared_slots', 2048),
+                                               slot_size=config.get('shared_slot_size', 16384),
+                                               ttl=config.get('shared_ttl', 86400), max_stale=max_stale,
+                                               codec=codec)
+            except OSError as e:
+                logger.error(f"Failed to open shared cache {config['shared_path']}: {e}")
+        elif config.get('sqlite_path'):
+            try:
+                persistent = SQLiteCache(config['sqlite_path'], ttl=config.get('sqlite_ttl', 86400),
+                                         table=table, max_stale=max_stale, codec=codec)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open SQLite cache {config['sqlite_path']}: {e}")
+        return cls(memory, persistent)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    async def get_entry(self, key: str, allow_stale: bool = False) -> Optional[Tuple[float, Any, bool]]:
+        """Return (stored_at, value, stale), preferring fresh data from any tier"""
+        entry = self.memory.get(key, allow_stale=allow_stale)
+        if entry is not None and not entry[2]:
+            return entry
+        if self.persistent is not None:
+            persisted = await self.persistent.get(key, allow_stale=allow_stale)
+            if persisted is not None and not persisted[2]:
+                stored_at, value, _ = persisted
+                # Promote, without outliving the persistent tier's freshness
+                self.memory.set(key, value, stored_at=stored_at,
+                                expires_at=min(time.time() + self.memory.ttl, stored_at + self.persistent.ttl))
+                return persisted
+            entry = entry or persisted
+        return entry
+
+    async def set(self, key: str, value: Any):
+        stored_at = time.time()
+        self.memory.set(key, value, stored_at=stored_at)
+        if self.persistent is not None:
+            await self.persistent.set(key, value, stored_at)
+
+    async def delete(self, key: str):
+        self.memory.delete(key)
+        if self.persistent is not None:
+            await self.persistent.delete(key)
+
+    async def delete_prefix(self, prefix: str, tier: str = "all") -> Dict[str, int]:
+        """Drop keys starting with prefix from one tier ('memory', 'persistent') or both"""
+        removed = {}
+        if tier in ("all", "memory"):
+            removed["memory"] = self.memory.delete_prefix(prefix)
+        if tier in ("all", "persistent") and self.persistent is not None:
+            removed["persistent"] = await self.persistent.delete_prefix(prefix)
+        return removed
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "persistent": await self.persistent.stats() if self.persistent is not None else None,
+        }
+
+    def close(self):
+        if self.persistent is not None:
+            self.persistent.close()
+
+# Single round trip replacement for the user, repos and events REST calls
+GITHUB_PROFILE_QUERY = """
+query($login: String!, $repoCount: Int!, $since: DateTime!) {
+  user(login: $login) {
+    name
+    bio
+    company
+    location
+    createdAt
+    followers { totalCount }
+    following { totalCount }
+    repositories(first: $repoCount, privacy: PUBLIC, ownerAffiliations: OWNER,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      nodes {
+        name
+        description
+        isFork
+        stargazerCount
+        forkCount
+        diskUsage
+        updatedAt
+        pushedAt
+        primaryLanguage { name }
+        repositoryTopics(first: 10) { nodes { topic { name } } }
+      }
+    }
+    contributionsCollection(from: $since) {
+      totalCommitContributions
+      totalPullRequestContributions
+      totalIssueContributions
+    }
+  }
+}
+"""
+
+class ConditionalRequestCache:
+    """ETag / Last-Modified store for GitHub conditional requests.
+
+    GitHub answers a matching If-None-Match / If-Modified-Since with 304, which
+    does not count against the rate limit, so repeat lookups reuse the stored body.
+    Entries are evicted least recently used first once either max_entries or
+    max_bytes (measured as serialized body size) is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 2000, path: Optional[str] = None, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+        self.responses_200 = 0
+        self.responses_304 = 0
+        self.load()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validators to send with the next request for this URL"""
+        entry = self.entries.get(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, response_headers, body: Any, next_url: Optional[str] = None):
+        """Remember a 200 response body along with its validators"""
+        self.responses_200 += 1
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        size = len(json_dumps(body))
+        self._discard(url)
+        if size > self.max_bytes:
+            return
+        self.entries[url] = {"etag": etag, "last_modified": last_modified, "body": body, "next_url": next_url,
+                             "size": size}
+        self.total_bytes += size
+        self._evict()
+
+    def _discard(self, url: str):
+        entry = self.entries.pop(url, None)
+        if entry is not None:
+            self.total_bytes -= entry['size']
+
+    def _evict(self):
+        while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, entry = self.entries.popitem(last=False)
+            self.total_bytes -= entry['size']
+
+    def revalidated(self, url: str, entry: Dict[str, Any]):
+        """Return (body, next_url) from the entry whose validators GitHub answered with 304"""
+        self.responses_304 += 1
+        if self.entries.get(url) is entry:
+            self.entries.move_to_end(url)
+        elif url not in self.entries:
+            # Evicted while the request was in flight; it is fresh again
+            self.entries[url] = entry
+            self.total_bytes += entry['size']
+            self._evict()
+        return entry['body'], entry.get('next_url')
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "responses_200": self.responses_200,
+            "responses_304": self.responses_304,
+        }
+
+    def load(self):
+        """Load persisted entries from disk, if a path is configured"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = OrderedDict(json.load(f))
+            for entry in self.entries.values():
+                entry.setdefault('size', len(json_dumps(entry['body'])))
+            self.total_bytes = sum(entry['size'] for entry in self.entries.values())
+            self._evict()
+            logger.info(f"Loaded {len(self.entries)} conditional cache entries from {self.path}")
+        except Exception as e:
+            logger.warning(f"Failed to load conditional cache from {self.path}: {e}")
+
+    def save(self):
+        """Persist entries to disk, if a path is configured"""
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save conditional cache to {self.path}: {e}")
+
+# GitHub request priorities; lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Priority of GitHub calls made by the current task (inherited by tasks it spawns)
+github_priority: ContextVar[int] = ContextVar('github_priority', default=PRIORITY_INTERACTIVE)
+
+# Event-loop time by which the current request must finish; GitHub and Gemini calls
+# shorten their timeouts to fit, and profile fetches may tighten it further
+request_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None without one"""
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - asyncio.get_running_loop().time()
+
+async def run_with_deadline(deadline: float, awaitable):
+    """Await under a deadline that nested calls observe, cancelling it once the deadline passes"""
+    token = request_deadline.set(deadline)
+    try:
+        async with asyncio.timeout_at(deadline):
+            return await awaitable
+    finally:
+        request_deadline.reset(token)
+
+class GitHubRequestScheduler:
+    """Token-bucket pacing for every GitHub API call.
+
+    Callers wait in a priority queue for a token instead of failing. Until GitHub
+    has reported a quota the bucket holds `burst` tokens and refills at the hourly
+    rate. After that, everything above `reserve` in X-RateLimit-Remaining can be
+    spent at once, and the rest is spread evenly over the time left until
+    X-RateLimit-Reset; once it reaches zero nothing is released until the reset.
+    """
+
+    def __init__(self, requests_per_hour: int = 5000, burst: int = 20, max_wait_seconds: float = 60,
+                 reserve: Optional[int] = None):
+        self.rate = requests_per_hour / 3600
+        self.burst = burst
+        self.reserve = requests_per_hour // 10 if reserve is None else reserve
+        self.max_wait_seconds = max_wait_seconds
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.granted = 0
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "tokens": round(self.tokens, 2),
+            "refill_per_second": round(self._rate(), 3),
+            "remaining": self.remaining,
+            "reset_at": self.reset_at,
+            "granted": self.granted,
+        }
+
+    async def acquire(self, priority: Optional[int] = None):
+        """Wait for permission to send one request"""
+        if priority is None:
+            priority = github_priority.get()
+        # Interactive callers shouldn't hang until an hourly window resets
+        if priority == PRIORITY_INTERACTIVE and self._quota_wait() > self.max_wait_seconds:
+            raise Exception("GitHub API rate limit exceeded. Please try again in a few minutes.")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.refund()
+            raise
+
+    def refund(self, quota: bool = True):
+        """Return a token for a request that was never sent.
+
+        With quota=False only the bucket token comes back, for requests whose
+        quota GitHub has already reported (e.g. a 304).
+        """
+        self.tokens = min(self._capacity(), self.tokens + 1)
+        if quota and self.remaining is not None:
+            self.remaining += 1
+
+    def update(self, remaining: Optional[int], reset_at: float):
+        """Record the quota left across all credentials, as reported by GitHub"""
+        self.remaining = remaining
+        self.reset_at = reset_at
+        if remaining is not None:
+            self.tokens = min(float(remaining), max(self.tokens, float(remaining - self.reserve)))
+
+    def _capacity(self) -> float:
+        """Most tokens the bucket may hold: the quota above the reserve, at least `burst`"""
+        if self.remaining is None:
+            return self.burst
+        return max(self.burst, self.remaining - self.reserve)
+
+    def _rate(self) -> float:
+        """Refill rate: the remaining quota spread over the rest of the window"""
+        window = self.reset_at - time.time()
+        if self.remaining is None or window <= 0:
+            return self.rate
+        return self.remaining / window
+
+    def retry_after(self, status: int, headers) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited response, or None"""
+        if status not in (403, 429):
+            return None
+        if headers.get('Retry-After'):
+            try:
+                return float(headers['Retry-After'])
+            except ValueError:
+                return None
+        if headers.get('X-RateLimit-Remaining') == '0':
+            if headers.get('X-RateLimit-Resource') == 'graphql':
+                # The scheduler only tracks the core quota; wait out the GraphQL window itself
+                try:
+                    return max(0.0, float(headers['X-RateLimit-Reset']) - time.time())
+                except (KeyError, ValueError):
+                    pass
+            # Core: zero while another token still has quota, so the retry fails over at once
+            return self._quota_wait()
+        return None
+
+    def _quota_wait(self) -> float:
+        if self.remaining is not None and self.remaining <= 0:
+            return max(0.0, self.reset_at - time.time())
+        return 0.0
+
+    def _delay(self) -> float:
+        quota_wait = self._quota_wait()
+        if quota_wait > 0:
+            return quota_wait
+        if self.remaining is not None and self.reset_at <= time.time():
+            # The window has reset
+            self.remaining = None
+        now = time.monotonic()
+        rate = self._rate()
+        self.tokens = min(self._capacity(), self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / rate
+
+    async def _dispatch(self):
+        """Hand out tokens to waiters in priority order until the queue drains"""
+        while True:
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                return
+            delay = self._delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            self.tokens -= 1
+            if self.remaining is not None:
+                self.remaining -= 1
+            self.granted += 1
+            future.set_result(None)
+
+class GitHubTokenPool:
+    """Pool of GitHub credentials balanced by remaining quota.
+
+    Each request goes to the token with the most quota left (tokens not seen yet
+    first); a token that reports zero remaining sits out until its reset time.
+    """
+
+    def __init__(self, tokens: List[Optional[str]]):
+        # A single None entry stands for unauthenticated access
+        self.state = {
+            token: {"remaining": None, "reset_at": 0.0, "requests": 0, "rate_limited": 0, "graphql_remaining": None}
+            for token in (tokens or [None])
+        }
+
+    @classmethod
+    def from_env(cls, token: Optional[str] = None) -> "GitHubTokenPool":
+        """Build the pool from an explicit token or the environment.
+
+        GITHUB_PERSONAL_ACCESS_TOKENS (comma-separated) and GITHUB_TOKENS_FILE (one
+        per line) are combined with the single GITHUB_PERSONAL_ACCESS_TOKEN.
+        """
+        if token:
+            return cls([token])
+        tokens = [t.strip() for t in os.getenv('GITHUB_PERSONAL_ACCESS_TOKENS', '').split(',')]
+        tokens_file = os.getenv('GITHUB_TOKENS_FILE')
+        if tokens_file:
+            try:
+                with open(tokens_file, 'r') as f:
+                    tokens.extend(line.strip() for line in f if not line.startswith('#'))
+            except OSError as e:
+                logger.error(f"Failed to read GitHub tokens file {tokens_file}: {e}")
+        tokens.append(os.getenv('GITHUB_PERSONAL_ACCESS_TOKEN', ''))
+        return cls(list(dict.fromkeys(t for t in tokens if t)))
+
+    @property
+    def authenticated(self) -> bool:
+        return None not in self.state
+
+    def __len__(self):
+        return len(self.state)
+
+    def choose(self) -> Optional[str]:
+        """Pick the healthiest token for the next request"""
+        now = time.time()
+        for state in self.state.values():
+            if state["remaining"] is not None and state["reset_at"] <= now:
+                # Quota window has reset
+                state["remaining"] = None
+
+        def health(item):
+            _, state = item
+            remaining = float('inf') if state["remaining"] is None else state["remaining"]
+            return (remaining, -state["requests"])
+
+        token, state = max(self.state.items(), key=health)
+        state["requests"] += 1
+        if state["remaining"] is not None:
+            state["remaining"] -= 1
+        return token
+
+    def update(self, token: Optional[str], status: int, headers):
+        """Record the quota GitHub reported for a token.
+
+        GraphQL has its own points budget, kept apart from the core quota that
+        drives token choice and the scheduler.
+        """
+        state = self.state.get(token)
+        if state is None:
+            return
+        if headers.get('X-RateLimit-Resource') == 'graphql':
+            try:
+                state["graphql_remaining"] = int(headers['X-RateLimit-Remaining'])
+            except (KeyError, ValueError):
+                pass
+            if status in (403, 429) and state["graphql_remaining"] == 0:
+                state["rate_limited"] += 1
+            return
+        if headers.get('X-RateLimit-Resource', 'core') != 'core':
+            return
+        try:
+            state["remaining"] = int(headers['X-RateLimit-Remaining'])
+            state["reset_at"] = float(headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        if status in (403, 429) and state["remaining"] == 0:
+            state["rate_limited"] += 1
+
+    def quota(self):
+        """Total remaining across tokens (None if any is unknown) and the earliest reset"""
+        remaining = [state["remaining"] for state in self.state.values()]
+        total = None if None in remaining else sum(remaining)
+        reset_at = min(state["reset_at"] for state in self.state.values())
+        return total, reset_at
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            (f"{token[:4]}...{token[-4:]}" if token else "anonymous"): dict(state)
+            for token, state in self.state.items()
+        }
+
+class RepoSummary:
+    """The fields of a GitHub repository payload the analysis actually reads.
+
+    Raw payloads carry dozens of URL fields per repo; pages are projected to
+    plain rows (cacheable as JSON) and turned into these slotted records.
+    """
+
+    __slots__ = ('name', 'full_name', 'description', 'language', 'stargazers_count', 'forks_count',
+                 'size', 'fork', 'topics', 'updated_at', 'pushed_at', 'language_bytes')
+
+    def __init__(self, name, full_name=None, description=None, language=None, stargazers_count=0,
+                 forks_count=0, size=1, fork=False, topics=None, updated_at=None, pushed_at=None):
+        self.name = name
+        self.full_name = full_name
+        self.description = description
+        self.language = language
+        self.stargazers_count = stargazers_count
+        self.forks_count = forks_count
+        self.size = size
+        self.fork = fork
+        self.topics = topics
+        self.updated_at = updated_at
+        self.pushed_at = pushed_at
+        # Real per-language byte counts, filled in by enrichment
+        self.language_bytes: Optional[Dict[str, int]] = None
+
+    @staticmethod
+    def project(page: List[Dict[str, Any]]) -> List[list]:
+        """Reduce a raw /repos page to constructor-ordered rows"""
+        return [
+            [repo.get('name'), repo.get('full_name'), repo.get('description'), repo.get('language'),
+             repo.get('stargazers_count', 0), repo.get('forks_count', 0), repo.get('size', 1),
+             repo.get('fork', False), repo.get('topics'), repo.get('updated_at'), repo.get('pushed_at')]
+            for repo in page
+        ]
+
+    def row(self) -> list:
+        """Constructor-ordered row, the inverse of project()"""
+        return [self.name, self.full_name, self.description, self.language, self.stargazers_count,
+                self.forks_count, self.size, self.fork, self.topics, self.updated_at, self.pushed_at]
+
+class EventSummary:
+    """The fields of a GitHub event payload the analysis actually reads"""
+
+    __slots__ = ('id', 'type', 'created_at', 'repo_name')
+
+    def __init__(self, id=None, type=None, created_at=None, repo_name=None):
+        self.id = id
+        self.type = type
+        self.created_at = created_at
+        self.repo_name = repo_name
+
+    @staticmethod
+    def project(events: List[Dict[str, Any]]) -> List[list]:
+        """Reduce a raw /events page to constructor-ordered rows"""
+        return [
+            [event.get('id'), event.get('type'), event.get('created_at'), (event.get('repo') or {}).get('name')]
+            for event in events
+        ]
+
+    def row(self) -> list:
+        return [self.id, self.type, self.created_at, self.repo_name]
+
+class RepoStats:
+    """Running aggregates over a user's repositories.
+
+    Repos stream in page by page; only the first `head_size` raw repos (the most
+    recently updated ones the analysis helpers look at) are kept, the rest are
+    folded into counters. Each repo's contribution is remembered by name, so a
+    repo seen again replaces its old contribution instead of adding to it.
+    """
+
+    def __init__(self, head_size: int = 20):
+        self.head_size = head_size
+        self.head: List[RepoSummary] = []
+        self.count = 0
+        self.forks = 0
+        self.language_counts: Dict[str, int] = {}
+        self.language_weights: Dict[str, int] = {}
+        # name -> (language, fork, weight)
+        self.contributions: Dict[str, Tuple[Optional[str], bool, int]] = {}
+
+    def add(self, repo: RepoSummary):
+        if self._account(repo) and len(self.head) < self.head_size:
+            self.head.append(repo)
+
+    def merge(self, updated: List[RepoSummary]):
+        """Fold in repos updated since a snapshot, most recently updated first"""
+        for repo in updated:
+            self._account(repo)
+        names = {repo.name for repo in updated}
+        self.head = (updated + [repo for repo in self.head if repo.name not in names])[:self.head_size]
+
+    def _account(self, repo: RepoSummary) -> bool:
+        """Count a repo, replacing any earlier contribution; True if it is new"""
+        previous = self.contributions.get(repo.name)
+        if previous is not None:
+            self._count(*previous, sign=-1)
+        else:
+            self.count += 1
+        # Weight by stars and size for better language ranking
+        weight = (repo.stargazers_count + 1) * (repo.size + 1)
+        self.contributions[repo.name] = (repo.language, repo.fork, weight)
+        self._count(repo.language, repo.fork, weight)
+        return previous is None
+
+    def _count(self, language: Optional[str], fork: bool, weight: int, sign: int = 1):
+        if fork:
+            self.forks += sign
+        if language:
+            self.language_counts[language] = self.language_counts.get(language, 0) + sign
+            self.language_weights[language] = self.language_weights.get(language, 0) + sign * weight
+            if not self.language_counts[language]:
+                del self.language_counts[language]
+                del self.language_weights[language]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Raw aggregates as plain data, for incremental refreshes"""
+        return {"head": [repo.row() for repo in self.head], "contributions": dict(self.contributions)}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any], head_size: int = 20) -> "RepoStats":
+        repo_stats = cls(head_size)
+        for name, (language, fork, weight) in snapshot['contributions'].items():
+            repo_stats.contributions[name] = (language, fork, weight)
+            repo_stats.count += 1
+            repo_stats._count(language, fork, weight)
+        repo_stats.head = [RepoSummary(*row) for row in snapshot['head']]
+        return repo_stats
+
+    def top_languages(self) -> List[str]:
+        """Top languages by usage and expertise, combined and deduplicated"""
+        # Real byte counts from enriched repositories beat the stars*size proxy
+        language_bytes: Dict[str, int] = {}
+        for repo in self.head:
+            for language, size in (repo.language_bytes or {}).items():
+                language_bytes[language] = language_bytes.get(language, 0) + size
+
+        # Ties go by name so incremental and full fetches (which count repos in different orders) agree
+        top_by_count = sorted(self.language_counts.items(), key=lambda x: (-x[1], x[0]))[:8]
+        top_by_weight = sorted((language_bytes or self.language_weights).items(), key=lambda x: (-x[1], x[0]))[:8]
+        return list(dict.fromkeys([lang[0] for lang in top_by_weight + top_by_count]))[:10]
+
 class GitHubAnalyzer:
-    def __init__(self, token: Optional[str] = None):
-        self.token = token or os.getenv('GITHUB_PERSONAL_ACCESS_TOKEN')
+    def __init__(self, token: Optional[str] = None, config: Optional[Dict[str, Any]] = None,
+                 requests_per_hour: int = 5000, profile_cache: Optional[TieredCache] = None,
+                 negative_cache: Optional[MemoryCache] = None):
+        self.credentials = GitHubTokenPool.from_env(token)
+        self.profile_cache = profile_cache
+        # Remembers users GitHub reported as missing, keyed like the profile cache
+        self.negative_cache = negative_cache
         self.base_url = "https://api.github.com"
+        self.config = config or {}
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        scheduler_config = self.config.get('scheduler', {})
+        self.scheduler = GitHubRequestScheduler(
+            requests_per_hour=requests_per_hour * len(self.credentials),
+            burst=scheduler_config.get('burst', 20),
+            max_wait_seconds=scheduler_config.get('max_wait_seconds', 60),
+            reserve=scheduler_config.get('reserve'),
+        )
+
+        # 'rest' (three calls) or 'graphql' (one call, requires a token)
+        self.fetch_mode = self.config.get('fetch_mode', 'rest')
+        if self.fetch_mode == 'graphql' and not self.credentials.authenticated:
+            logger.warning("GraphQL fetch mode requires a GitHub token - falling back to REST")
+            self.fetch_mode = 'rest'
+
+        # Timeouts, retries and hedging for GETs
+        self.resilience_config = self.config.get('resilience', {})
+        self.latencies = deque(maxlen=200)
+        self.resilience_stats = {"retries": 0, "hedged": 0, "budget_exceeded": 0}
+
+        # Per-repository languages/topics keyed by full name, valid while pushed_at is unchanged
+        self.enrichment_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Raw repo aggregates and events per user, so REST refreshes only fetch what changed.
+        # Snapshots expire after full_refresh_after to pick up deleted or renamed repos.
+        incremental_config = self.config.get('incremental', {})
+        self.snapshots = None
+        if incremental_config.get('enabled', True):
+            self.snapshots = MemoryCache(
+                max_entries=incremental_config.get('max_snapshots', 2000),
+                ttl=incremental_config.get('full_refresh_after', 86400),
+            )
+        self.refresh_stats = {"full": 0, "incremental": 0}
+
+        conditional_config = self.config.get('conditional_cache', {})
+        self.conditional_cache = None
+        if conditional_config.get('enabled', True):
+            self.conditional_cache = ConditionalRequestCache(
+                max_entries=conditional_config.get('max_entries', 2000),
+                max_bytes=conditional_config.get('max_bytes', 16 * 1024 * 1024),
+                path=conditional_config.get('path'),
+            )
 
         # Log token status for debugging (without exposing the actual token)
-        if self.token:
-            logger.info(f"GitHub token configured: {self.token[:12]}...")
+        if self.credentials.authenticated:
+            logger.info(f"GitHub tokens configured: {', '.join(self.credentials.stats())}")
         else:
             logger.warning("No GitHub token found - API rate limits will be lower")
-        
-    async def get_user_profile(self, username: str) -> Dict[str, Any]:
-        """Fetch real GitHub user profile data"""
+
+    async def start(self):
+        """Open the shared, connection-pooled HTTP session"""
+        if self.session is not None and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.config.get('pool_size', 100),
+            limit_per_host=self.config.get('pool_size_per_host', 20),
+            ttl_dns_cache=self.config.get('dns_cache_ttl', 300),
+            keepalive_timeout=self.config.get('keepalive_timeout', 30),
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+        logger.info("GitHub HTTP session opened")
+
+    async def close(self):
+        """Close the shared HTTP session and its connection pool"""
+        if self.conditional_cache:
+            self.conditional_cache.save()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+            logger.info("GitHub HTTP session closed")
+        self.session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, opening it lazily outside the app lifespan"""
+        if self.session is None or self.session.closed:
+            await self.start()
+        return self.session
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-token quota, scheduler queue, conditional request and retry counters"""
+        return {
+            "fetch_mode": self.fetch_mode,
+            "tokens": self.credentials.stats(),
+            "scheduler": self.scheduler.stats(),
+            "conditional_cache": self.conditional_cache.stats() if self.conditional_cache else None,
+            "resilience": dict(self.resilience_stats),
+            "refreshes": dict(self.refresh_stats),
+        }
+
+    async def get_user_profile(self, username: str, priority: int = PRIORITY_INTERACTIVE,
+                               use_cache: bool = True, check_negative: bool = True) -> Dict[str, Any]:
+        """Fetch real GitHub user profile data, served from the profile cache when fresh.
+
+        Callers that already looked the username up in the negative cache pass
+        check_negative=False, so each request counts as one hit or miss there.
+        """
+        # GitHub usernames are case-insensitive
+        cache_key = username.lower()
+        if self.negative_cache is not None and check_negative:
+            rejected = self.negative_cache.get(cache_key)
+            if rejected is not None:
+                raise Exception(rejected[1])
+        if self.profile_cache is not None and use_cache:
+            profile = await self.profile_cache.get(cache_key)
+            if profile is not None:
+                return profile
+
+        profile = await self._fetch_profile(username, priority)
+        if self.profile_cache is not None:
+            await self.profile_cache.set(cache_key, profile)
+        return profile
+
+    async def peek_profile(self, username: str) -> Optional[Tuple[float, Dict[str, Any], bool]]:
+        """Cached (stored_at, profile, stale) for a user, including stale entries"""
+        if self.profile_cache is None:
+            return None
+        return await self.profile_cache.get_entry(username.lower(), allow_stale=True)
+
+    async def _fetch_profile(self, username: str, priority: int) -> Dict[str, Any]:
+        """Fetch and derive a profile from the GitHub API"""
+        # Authorization is added per request from the credential pool
         headers = {}
-        if self.token:
-            headers['Authorization'] = f'token {self.token}'
-            
+
+        priority_token = github_priority.set(priority)
+        budget = self.resilience_config.get('budget_seconds', 20)
+        deadline = asyncio.get_running_loop().time() + budget
+        if request_deadline.get() is not None:
+            deadline = min(deadline, request_deadline.get())
+        deadline_token = request_deadline.set(deadline)
         try:
-            async with aiohttp.ClientSession() as session:
-                # Get user basic info
-                async with session.get(f"{self.base_url}/users/{username}", headers=headers, ssl=False) as response:
-                    if response.status == 404:
-                        raise Exception(f"GitHub user '{username}' not found. Please check the username and try again.")
-                    elif response.status == 403:
-                        raise Exception("GitHub API rate limit exceeded. Please try again in a few minutes.")
-                    elif response.status != 200:
-                        raise Exception(f"GitHub API error: Unable to fetch profile (Status: {response.status})")
-                    user_data = await response.json()
-                
-                # Get user repositories with detailed info
-                async with session.get(f"{self.base_url}/users/{username}/repos?per_page=100&sort=updated", headers=headers, ssl=False) as response:
-                    if response.status == 200:
-                        repos_data = await response.json()
-                    else:
-                        repos_data = []
-
-                # Get user's recent activity (events)
-                async with session.get(f"{self.base_url}/users/{username}/events/public?per_page=30", headers=headers, ssl=False) as response:
-                    if response.status == 200:
-                        events_data = await response.json()
-                    else:
-                        events_data = []
-
-                # Analyze repositories in detail
-                repo_analysis = await self._analyze_repositories(session, headers, username, repos_data[:20])  # Analyze top 20 repos
-
-                # Analyze activity patterns
-                activity_analysis = self._analyze_activity_patterns(events_data, repos_data)
-
-                # Calculate comprehensive language statistics
-                languages = {}
-                language_bytes = {}
-                for repo in repos_data:
-                    if repo.get('language'):
-                        languages[repo['language']] = languages.get(repo['language'], 0) + 1
-                        # Weight by stars and size for better language ranking
-                        weight = (repo.get('stargazers_count', 0) + 1) * (repo.get('size', 1) + 1)
-                        language_bytes[repo['language']] = language_bytes.get(repo['language'], 0) + weight
-
-                # Get top languages by usage and expertise
-                top_languages_by_count = sorted(languages.items(), key=lambda x: x[1], reverse=True)[:8]
-                top_languages_by_bytes = sorted(language_bytes.items(), key=lambda x: x[1], reverse=True)[:8]
-
-                # Combine and deduplicate languages
-                all_languages = list(dict.fromkeys([lang[0] for lang in top_languages_by_bytes + top_languages_by_count]))[:10]
-
-                return {
-                    "username": username,
-                    "name": user_data.get('name', username),
-                    "bio": user_data.get('bio', ''),
-                    "repos": user_data.get('public_repos', 0),
-                    "followers": user_data.get('followers', 0),
-                    "following": user_data.get('following', 0),
-                    "languages": all_languages,
-                    "company": user_data.get('company', ''),
-                    "location": user_data.get('location', ''),
-                    "created_at": user_data.get('created_at', ''),
-                    "repository_count": len(repos_data),
-                    "recent_repos": [repo['name'] for repo in repos_data[:5]],
-
-                    # Enhanced data for better recommendations
-                    "repo_analysis": repo_analysis,
-                    "activity_analysis": activity_analysis,
-                    "expertise_level": self._calculate_expertise_level(user_data, repos_data, activity_analysis),
-                    "preferred_domains": self._extract_project_domains(repos_data),
-                    "collaboration_style": self._analyze_collaboration_style(repos_data, events_data),
-                    "recent_activity_score": activity_analysis.get('recent_activity_score', 0),
-                    "technology_diversity": len(all_languages),
-                    "project_complexity_preference": repo_analysis.get('avg_complexity', 'intermediate')
-                }
-                
+            session = await self._get_session()
+            if self.fetch_mode == 'graphql':
+                user_data, repo_stats, events_data = await self._fetch_graphql(session, headers, username)
+                return await self._build_profile(session, headers, username, user_data, repo_stats, events_data)
+
+            snapshot = self.snapshots.get(username.lower()) if self.snapshots is not None else None
+            user_data, repo_stats, events_data = await self._fetch_rest(
+                session, headers, username, snapshot[1] if snapshot else None)
+            profile = await self._build_profile(session, headers, username, user_data, repo_stats, events_data)
+            self.refresh_stats["incremental" if snapshot else "full"] += 1
+            if self.snapshots is not None:
+                # Deltas keep the original expiry so a full rebuild still happens periodically
+                stored_at = snapshot[0] if snapshot else time.time()
+                self.snapshots.set(username.lower(),
+                                   {"repos": repo_stats.snapshot(), "events": [event.row() for event in events_data]},
+                                   stored_at=stored_at, expires_at=stored_at + self.snapshots.ttl)
+            return profile
+
         except Exception as e:
             logger.error(f"GitHub API error for {username}: {e}")
             # Re-raise the exception to be handled by the calling function
             # This ensures proper error messages reach the frontend
             raise e
+        finally:
+            github_priority.reset(priority_token)
+            request_deadline.reset(deadline_token)
+
+    async def _fetch_rest(self, session, headers, username, snapshot=None):
+        """Fetch user, repositories and events with three REST calls.
+
+        With a snapshot from an earlier fetch, only repos and events newer than it are fetched.
+        """
+        if snapshot is None:
+            repos = self._collect_repos(session, headers, username)
+            events = self._fetch_events(session, headers, username)
+        else:
+            repos = self._collect_repo_updates(session, headers, username, snapshot['repos'])
+            events = self._fetch_event_updates(session, headers, username, snapshot['events'])
+        # User, repositories and recent activity are independent, so fetch them concurrently
+        user_task = asyncio.create_task(self._fetch_user(session, headers, username))
+        repos_task = asyncio.create_task(repos)
+        events_task = asyncio.create_task(events)
+        try:
+            # The user lookup decides 404/403 handling; don't wait on the others if it fails
+            user_data = await user_task
+            repo_stats, events_data = await asyncio.gather(repos_task, events_task)
+        finally:
+            for task in (user_task, repos_task, events_task):
+                if not task.done():
+                    task.cancel()
+        return user_data, repo_stats, events_data
+
+    async def _fetch_events(self, session, headers, username):
+        """Fetch recent public events as EventSummary records"""
+        rows = await self._fetch_optional(
+            session, headers, f"{self.base_url}/users/{username}/events/public?per_page=30", [],
+            project=EventSummary.project)
+        return [EventSummary(*row) for row in rows]
+
+    async def _fetch_event_updates(self, session, headers, username, snapshot_rows):
+        """Prepend events newer than the snapshot, reading a short first page"""
+        previous = [EventSummary(*row) for row in snapshot_rows]
+        cursor = previous[0].id if previous else None
+        page_size = self.config.get('incremental', {}).get('page_size', 10)
+        rows = await self._fetch_optional(
+            session, headers, f"{self.base_url}/users/{username}/events/public?per_page={page_size}", [],
+            project=EventSummary.project)
+        updates = []
+        for row in rows:
+            if row[0] == cursor:
+                break
+            updates.append(EventSummary(*row))
+        else:
+            if len(rows) == page_size:
+                # The whole page is new, so the gap may be wider; fetch the usual window
+                return await self._fetch_events(session, headers, username)
+        return (updates + previous)[:30]
+
+    async def _iter_repo_pages(self, session, headers, username, max_pages, per_page=100):
+        """Yield pages of RepoSummary records, following Link rel="next" headers"""
+        url = f"{self.base_url}/users/{username}/repos?per_page={per_page}&sort=updated"
+        for _ in range(max_pages):
+            try:
+                status, rows, next_url = await self._get_json(session, url, headers, project=RepoSummary.project)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"GitHub request failed for {url}: {e!r}")
+                return
+            if status != 200 or not rows:
+                return
+            yield [RepoSummary(*row) for row in rows]
+            if not next_url:
+                return
+            url = next_url
+
+    async def _collect_repos(self, session, headers, username):
+        """Stream repository pages into RepoStats, stopping once the language signal settles"""
+        pages_config = self.config.get('repo_pages', {})
+        max_pages = pages_config.get('max_pages', 10)
+        stable_pages = pages_config.get('stable_pages', 2)
+
+        repo_stats = RepoStats()
+        previous_languages = None
+        unchanged_pages = 0
+        async with aclosing(self._iter_repo_pages(session, headers, username, max_pages)) as pages:
+            async for page in pages:
+                for repo in page:
+                    repo_stats.add(repo)
+                top_languages = repo_stats.top_languages()
+                unchanged_pages = unchanged_pages + 1 if top_languages == previous_languages else 0
+                previous_languages = top_languages
+                if stable_pages and unchanged_pages >= stable_pages:
+                    break
+        return repo_stats
+
+    async def _collect_repo_updates(self, session, headers, username, snapshot):
+        """Apply repos updated since the snapshot to its aggregates.
+
+        Repos come newest-updated first, so paging stops at the snapshot's newest repo.
+        """
+        repo_stats = RepoStats.from_snapshot(snapshot)
+        cursor = repo_stats.head[0].updated_at if repo_stats.head else None
+        max_pages = self.config.get('repo_pages', {}).get('max_pages', 10)
+        page_size = self.config.get('incremental', {}).get('page_size', 10)
+        updated = []
+        async with aclosing(self._iter_repo_pages(session, headers, username, max_pages, page_size)) as pages:
+            async for page in pages:
+                caught_up = False
+                for repo in page:
+                    if cursor and repo.updated_at and repo.updated_at <= cursor:
+                        caught_up = True
+                        break
+                    updated.append(repo)
+                if caught_up:
+                    break
+        repo_stats.merge(updated)
+        return repo_stats
+
+    async def _fetch_graphql(self, session, headers, username):
+        """Fetch user, repositories and contribution counts in one GraphQL query.
+
+        Results are reshaped into the REST payload layout so _build_profile is shared.
+        """
+        from datetime import datetime, timedelta, timezone
+        since = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+        payload = {
+            "query": GITHUB_PROFILE_QUERY,
+            "variables": {"login": username, "repoCount": 100, "since": since},
+        }
+        graphql_url = self.config.get('graphql_url') or f"{self.base_url}/graphql"
+        status, result, _ = await self._request_json(session, graphql_url, headers, payload=payload)
+        if status == 401:
+            raise Exception("GitHub authentication failed. Please check the GitHub token configuration.")
+        elif status in (403, 429):
+            raise Exception("GitHub API rate limit exceeded. Please try again in a few minutes.")
+        elif status != 200:
+            raise Exception(f"GitHub API error: Unable to fetch profile (Status: {status})")
+
+        error_types = {error.get('type') for error in result.get('errors') or []}
+        if 'RATE_LIMITED' in error_types:
+            raise Exception("GitHub API rate limit exceeded. Please try again in a few minutes.")
+        user = (result.get('data') or {}).get('user')
+        if not user:
+            if error_types - {'NOT_FOUND'}:
+                raise Exception(f"GitHub API error: Unable to fetch profile ({', '.join(sorted(filter(None, error_types)))})")
+            raise self._not_found(username)
+
+        repositories = user.get('repositories') or {}
+        user_data = {
+            "name": user.get('name'),
+            "bio": user.get('bio'),
+            "company": user.get('company'),
+            "location": user.get('location'),
+            "created_at": user.get('createdAt'),
+            "public_repos": repositories.get('totalCount', 0),
+            "followers": (user.get('followers') or {}).get('totalCount', 0),
+            "following": (user.get('following') or {}).get('totalCount', 0),
+        }
+        repo_stats = RepoStats()
+        for repo in repositories.get('nodes') or []:
+            repo_stats.add(RepoSummary(
+                name=repo.get('name'),
+                description=repo.get('description'),
+                fork=repo.get('isFork', False),
+                stargazers_count=repo.get('stargazerCount', 0),
+                forks_count=repo.get('forkCount', 0),
+                size=repo.get('diskUsage') or 0,
+                updated_at=repo.get('updatedAt'),
+                pushed_at=repo.get('pushedAt'),
+                language=(repo.get('primaryLanguage') or {}).get('name'),
+                topics=[node['topic']['name'] for node in (repo.get('repositoryTopics') or {}).get('nodes', [])],
+            ))
+        events_data = self._contribution_events(user.get('contributionsCollection') or {})
+        return user_data, repo_stats, events_data
+
+    def _contribution_events(self, contributions):
+        """Approximate the last 30 public events from 30-day contribution counts"""
+        from datetime import datetime, timezone
+        counts = {
+            'PushEvent': contributions.get('totalCommitContributions', 0),
+            'PullRequestEvent': contributions.get('totalPullRequestContributions', 0),
+            'IssuesEvent': contributions.get('totalIssueContributions', 0),
+        }
+        # The REST events page holds at most 30 entries; scale counts down to match
+        total = sum(counts.values())
+        if total > 30:
+            counts = {event_type: round(count * 30 / total) for event_type, count in counts.items()}
+        now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        return [EventSummary(type=event_type, created_at=now) for event_type, count in counts.items() for _ in range(count)]
+
+    async def _build_profile(self, session, headers, username, user_data, repo_stats, events_data):
+        """Derive the profile dict from raw user data, repository aggregates and events"""
+        repos_data = repo_stats.head
+
+        # Analyze repositories in detail
+        repo_analysis = await self._analyze_repositories(session, headers, username, repos_data[:20])  # Analyze top 20 repos
+
+        # Analyze activity patterns
+        activity_analysis = self._analyze_activity_patterns(events_data, repos_data)
+
+        # Comprehensive language statistics across every streamed repository
+        all_languages = repo_stats.top_languages()
+
+        return {
+            "username": username,
+            "name": user_data.get('name', username),
+            "bio": user_data.get('bio', ''),
+            "repos": user_data.get('public_repos', 0),
+            "followers": user_data.get('followers', 0),
+            "following": user_data.get('following', 0),
+            "languages": all_languages,
+            "company": user_data.get('company', ''),
+            "location": user_data.get('location', ''),
+            "created_at": user_data.get('created_at', ''),
+            "repository_count": repo_stats.count,
+            "recent_repos": [repo.name for repo in repos_data[:5]],
+
+            # Enhanced data for better recommendations
+            "repo_analysis": repo_analysis,
+            "activity_analysis": activity_analysis,
+            "expertise_level": self._calculate_expertise_level(user_data, repos_data, activity_analysis),
+            "preferred_domains": self._extract_project_domains(repos_data),
+            "collaboration_style": self._analyze_collaboration_style(repo_stats, events_data),
+            "recent_activity_score": activity_analysis.get('recent_activity_score', 0),
+            "technology_diversity": len(all_languages),
+            "project_complexity_preference": repo_analysis.get('avg_complexity', 'intermediate')
+        }
+        
+
+    async def _get_json(self, session, url, headers, project=None):
+        """GET a GitHub URL, revalidating against the conditional cache.
+
+        Returns (status, data, next_url); a 304 is reported as 200 with the cached
+        body, and next_url is the Link rel="next" target for paginated endpoints.
+        `project` reduces the decoded payload before it is cached and returned.
+        """
+        request_headers = dict(headers)
+        cached = None
+        if self.conditional_cache:
+            # Hold on to the body the validators vouch for; LRU may evict it before the 304 arrives
+            cached = self.conditional_cache.entries.get(url)
+            request_headers.update(self.conditional_cache.conditional_headers(url))
+        return await self._request_json(session, url, request_headers, project, cached=cached)
+
+    async def _request_json(self, session, url, headers, project=None, payload=None, cached=None):
+        """Send a GitHub request with retries, backoff and rate-limit waits.
+
+        GETs unless `payload` is given, which is POSTed as JSON (GraphQL queries are
+        read-only, so they are retried and hedged like GETs). `cached` is the
+        conditional cache entry a 304 answers with.
+        """
+        retries = self.resilience_config.get('retries', 2)
+        for attempt in range(retries + 1):
+            self._check_budget()
+            try:
+                status, data, next_url, retry_after = await self._send_hedged(session, url, headers, project, payload, cached)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == retries:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise asyncio.TimeoutError("GitHub API is taking too long to respond. Please try again in a moment.")
+                    raise
+                logger.warning(f"GitHub request failed for {url} ({e!r}), retrying")
+                await self._backoff(attempt)
+                continue
+
+            if status >= 500 and attempt < retries:
+                logger.warning(f"GitHub returned {status} for {url}, retrying")
+                await self._backoff(attempt)
+                continue
+            if retry_after is None or attempt == retries:
+                return status, data, next_url
+            if github_priority.get() == PRIORITY_INTERACTIVE and retry_after > self.scheduler.max_wait_seconds:
+                return status, data, next_url
+            logger.warning(f"GitHub rate limit hit, retrying {url} in {retry_after:.0f}s")
+            await asyncio.sleep(retry_after)
+        return status, data, next_url
+
+    async def _send(self, session, url, headers, project, payload=None, cached=None,
+                    granted: Optional[asyncio.Event] = None):
+        """Send one rate-limited request; returns (status, data, next_url, retry_after).
+
+        `granted` is set once the scheduler lets the request go out.
+        """
+        await self.scheduler.acquire()
+        if granted is not None:
+            granted.set()
+        token = self.credentials.choose()
+        request_headers = dict(headers)
+        if token:
+            request_headers['Authorization'] = f'token {token}'
+        started = time.monotonic()
+        if payload is None:
+            request = session.get(url, headers=request_headers, ssl=False, timeout=self._attempt_timeout())
+        else:
+            request = session.post(url, json=payload, headers=request_headers, ssl=False, timeout=self._attempt_timeout())
+        async with request as response:
+            self.credentials.update(token, response.status, response.headers)
+            self.scheduler.update(*self.credentials.quota())
+            if response.status == 304 and cached is not None:
+                # Conditional hits don't count against the quota; the reported remaining already reflects that
+                self.scheduler.refund(quota=False)
+                result = (200, *self.conditional_cache.revalidated(url, cached), None)
+            elif response.status == 200:
+                data = json_loads(await response.read())
+                if project:
+                    data = project(data)
+                next_link = response.links.get('next')
+                next_url = str(next_link['url']) if next_link else None
+                if self.conditional_cache and payload is None:
+                    self.conditional_cache.store(url, response.headers, data, next_url)
+                result = (200, data, next_url, None)
+            else:
+                result = (response.status, None, None, self.scheduler.retry_after(response.status, response.headers))
+        self.latencies.append(time.monotonic() - started)
+        return result
+
+    async def _send_hedged(self, session, url, headers, project, payload=None, cached=None):
+        """Send a request, firing a duplicate if it runs past the observed p95 latency"""
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await self._send(session, url, headers, project, payload, cached)
+
+        granted = asyncio.Event()
+        pending = {asyncio.create_task(self._send(session, url, headers, project, payload, cached, granted))}
+        try:
+            # Time queued in the scheduler isn't GitHub latency; start the hedge timer once the request is sent
+            waiter = asyncio.create_task(granted.wait())
+            try:
+                await asyncio.wait(pending | {waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                self.resilience_stats["hedged"] += 1
+                pending.add(asyncio.create_task(self._send(session, url, headers, project, payload, cached)))
+            error = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """p95 of recent request latencies, or None when hedging is off or unwarmed"""
+        if not self.resilience_config.get('hedge', False):
+            return None
+        if len(self.latencies) < self.resilience_config.get('hedge_min_samples', 20):
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _attempt_timeout(self) -> aiohttp.ClientTimeout:
+        """Per-attempt timeout, shortened to whatever is left of the latency budget"""
+        total = self.resilience_config.get('attempt_timeout', 10)
+        deadline = request_deadline.get()
+        if deadline is not None:
+            # A zero total would disable aiohttp's timeout entirely
+            total = max(0.001, min(total, deadline - asyncio.get_running_loop().time()))
+        return aiohttp.ClientTimeout(total=total, sock_connect=self.resilience_config.get('connect_timeout', 3))
+
+    def _check_budget(self):
+        deadline = request_deadline.get()
+        if deadline is not None and asyncio.get_running_loop().time() >= deadline:
+            self.resilience_stats["budget_exceeded"] += 1
+            raise asyncio.TimeoutError("GitHub API is taking too long to respond. Please try again in a moment.")
+
+    async def _backoff(self, attempt: int):
+        """Sleep with full-jitter exponential backoff, never past the latency budget"""
+        self.resilience_stats["retries"] += 1
+        base = self.resilience_config.get('backoff_base', 0.25)
+        cap = self.resilience_config.get('backoff_max', 4)
+        delay = random.uniform(0, min(cap, base * 2 ** attempt))
+        deadline = request_deadline.get()
+        if deadline is not None:
+            delay = min(delay, max(0.0, deadline - asyncio.get_running_loop().time()))
+        await asyncio.sleep(delay)
+
+    async def _fetch_user(self, session, headers, username):
+        """Fetch basic user info, raising user-facing errors for bad statuses"""
+        status, user_data, _ = await self._get_json(session, f"{self.base_url}/users/{username}", headers)
+        if status == 404:
+            raise self._not_found(username)
+        elif status == 403:
+            raise Exception("GitHub API rate limit exceeded. Please try again in a few minutes.")
+        elif status != 200:
+            raise Exception(f"GitHub API error: Unable to fetch profile (Status: {status})")
+        return user_data
+
+    def _not_found(self, username):
+        """Build the not-found error and remember it in the negative cache"""
+        message = f"GitHub user '{username}' not found. Please check the username and try again."
+        if self.negative_cache is not None:
+            self.negative_cache.set(username.lower(), message)
+        return Exception(message)
+
+    async def _fetch_optional(self, session, headers, url, default=None, project=None):
+        """Fetch a JSON document, returning `default` on any failure"""
+        try:
+            status, data, _ = await self._get_json(session, url, headers, project=project)
+            return data if status == 200 else default
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"GitHub request failed for {url}: {e!r}")
+            return default
+
+    async def _enrich_repositories(self, session, headers, username, repos_data):
+        """Attach real language byte counts (and missing topics) to the top repositories.
+
+        Requests run concurrently under a semaphore, and results are reused until a
+        repository's pushed_at changes.
+        """
+        enrichment_config = self.config.get('enrichment', {})
+        if not enrichment_config.get('enabled', False):
+            return
+        semaphore = asyncio.Semaphore(enrichment_config.get('concurrency', 5))
+        max_entries = enrichment_config.get('cache_entries', 5000)
+
+        async def enrich(repo):
+            full_name = repo.full_name or f"{username}/{repo.name}"
+            cached = self.enrichment_cache.get(full_name)
+            if cached and cached['pushed_at'] == repo.pushed_at:
+                self.enrichment_cache.move_to_end(full_name)
+            else:
+                async with semaphore:
+                    languages = await self._fetch_optional(
+                        session, headers, f"{self.base_url}/repos/{full_name}/languages")
+                    topics = repo.topics
+                    if topics is None:
+                        topics_data = await self._fetch_optional(
+                            session, headers, f"{self.base_url}/repos/{full_name}/topics", {})
+                        topics = topics_data.get('names', [])
+                if languages is None:
+                    return
+                cached = {"pushed_at": repo.pushed_at, "languages": languages, "topics": topics}
+                self.enrichment_cache[full_name] = cached
+                while len(self.enrichment_cache) > max_entries:
+                    self.enrichment_cache.popitem(last=False)
+            repo.language_bytes = cached['languages']
+            if repo.topics is None:
+                repo.topics = cached['topics']
+
+        await asyncio.gather(*(enrich(repo) for repo in repos_data[:enrichment_config.get('top_repos', 10)]))
 
     async def _analyze_repositories(self, session, headers, username, repos_data):
         """Analyze repositories for deeper insights"""
+        await self._enrich_repositories(session, headers, username, repos_data)
+
         analysis = {
             "total_stars": 0,
             "total_forks": 0,
@@ -183,16 +1852,16 @@ class GitHubAnalyzer:
 
         for repo in repos_data:
             # Aggregate stats
-            analysis["total_stars"] += repo.get('stargazers_count', 0)
-            analysis["total_forks"] += repo.get('forks_count', 0)
+            analysis["total_stars"] += repo.stargazers_count
+            analysis["total_forks"] += repo.forks_count
 
             # Collect topics
-            if repo.get('topics'):
-                all_topics.extend(repo['topics'])
+            if repo.topics:
+                all_topics.extend(repo.topics)
 
             # Analyze repo characteristics
-            repo_name = repo.get('name', '').lower()
-            repo_desc = (repo.get('description') or '').lower()
+            repo_name = (repo.name or '').lower()
+            repo_desc = (repo.description or '').lower()
 
             # Detect frameworks and project types
             if any(fw in repo_name or fw in repo_desc for fw in ['react', 'vue', 'angular']):
@@ -208,9 +1877,9 @@ class GitHubAnalyzer:
 
             # Check recent activity (updated in last 6 months)
             from datetime import datetime, timedelta
-            if repo.get('updated_at'):
+            if repo.updated_at:
                 try:
-                    updated = datetime.fromisoformat(repo['updated_at'].replace('Z', '+00:00'))
+                    updated = datetime.fromisoformat(repo.updated_at.replace('Z', '+00:00'))
                     if updated > datetime.now().replace(tzinfo=updated.tzinfo) - timedelta(days=180):
                         analysis["recent_activity"] = True
                 except:
@@ -255,13 +1924,13 @@ class GitHubAnalyzer:
 
         for event in events_data:
             try:
-                event_date = datetime.fromisoformat(event['created_at'].replace('Z', '+00:00'))
+                event_date = datetime.fromisoformat(event.created_at.replace('Z', '+00:00'))
                 if event_date > datetime.now().replace(tzinfo=event_date.tzinfo) - timedelta(days=30):
                     recent_events += 1
 
-                    if event['type'] == 'PushEvent':
+                    if event.type == 'PushEvent':
                         push_events += 1
-                    elif event['type'] in ['PullRequestEvent', 'IssuesEvent']:
+                    elif event.type in ['PullRequestEvent', 'IssuesEvent']:
                         pr_events += 1
             except:
                 continue
@@ -318,7 +1987,7 @@ class GitHubAnalyzer:
         factors["activity"] = activity_analysis.get('recent_activity_score', 0) * 0.15  # Max 15 points
 
         # Repository complexity (stars, forks)
-        total_stars = sum(repo.get('stargazers_count', 0) for repo in repos_data[:10])
+        total_stars = sum(repo.stargazers_count for repo in repos_data[:10])
         factors["complexity"] = min(int(total_stars * 0.2), 10)  # Max 10 points
 
         total_score = sum(factors.values())
@@ -337,9 +2006,9 @@ class GitHubAnalyzer:
         domains = []
 
         for repo in repos_data[:15]:  # Check top 15 repos
-            name = (repo.get('name') or '').lower()
-            desc = (repo.get('description') or '').lower()
-            topics = repo.get('topics', [])
+            name = (repo.name or '').lower()
+            desc = (repo.description or '').lower()
+            topics = repo.topics or []
 
             # Web development
             if any(term in name or term in desc for term in ['web', 'website', 'frontend', 'backend', 'fullstack']):
@@ -380,13 +2049,13 @@ class GitHubAnalyzer:
         domain_counts = Counter(domains)
         return [domain for domain, count in domain_counts.most_common(5)]
 
-    def _analyze_collaboration_style(self, repos_data, events_data):
+    def _analyze_collaboration_style(self, repo_stats, events_data):
         """Analyze collaboration preferences"""
-        forked_repos = sum(1 for repo in repos_data if repo.get('fork', False))
-        original_repos = len(repos_data) - forked_repos
+        forked_repos = repo_stats.forks
+        original_repos = repo_stats.count - forked_repos
 
         # Count collaboration events
-        collab_events = sum(1 for event in events_data if event.get('type') in ['PullRequestEvent', 'IssuesEvent', 'ForkEvent'])
+        collab_events = sum(1 for event in events_data if event.type in ['PullRequestEvent', 'IssuesEvent', 'ForkEvent'])
 
         if forked_repos > original_repos * 0.5 or collab_events > 5:
             return "collaborative"
@@ -395,68 +2064,138 @@ class GitHubAnalyzer:
         else:
             return "independent"
 
-class AIAgentClient:
-    """Client for communicating with AI models via Gemini API"""
+# Output layout the UI parses (RecommendationDisplay); supersedes any format section in agent instructions
+RECOMMENDATION_FORMAT = """CRITICAL FORMATTING REQUIREMENTS - FOLLOW EXACTLY:
 
-    def __init__(self, gateway_url: str):
-        self.gateway_url = gateway_url
-        # Configure Gemini API
-        self.gemini_api_key = os.getenv('GEMINI_API_KEY')
-        if self.gemini_api_key:
-            genai.configure(
-                api_key=self.gemini_api_key,
-                transport='rest'
-            )
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            logger.warning("GEMINI_API_KEY not found, will use fallback responses")
-            self.model = None
+📊 **Profile Analysis Summary**
+[Brief analysis of the user's skills and experience]
 
-    async def call_agent(self, agent_config: Dict[str, Any], profile_data: Dict[str, Any]) -> str:
-        """Call an AI agent with the given configuration and data"""
-        try:
-            # Extract agent configuration
-            instructions = agent_config.get('instructions', '')
-            temperature = agent_config.get('parameters', {}).get('temperature', 0.7)
-            max_tokens = agent_config.get('parameters', {}).get('max_tokens', 1500)
+🚀 **Top 5 Hackathon Project Recommendations**
+
+1. 🎯 **[Project Title]**
+DESC: [Clear 2-3 sentence description of what the project does]
+TECH: [Comma-separated list of specific technologies]
+IMPL: [Step-by-step implementation approach]
+DIFF: [Beginner/Intermediate/Advanced]
+IMPACT: [Problem it solves and value]
+TIME: [Hours estimate like "24-36 hours"]
 
-            # Create the prompt for the AI agent
-            prompt = self._create_agent_prompt(instructions, profile_data)
+[Projects 2-5 in exactly the same format]
 
-            # Try Gemini API
-            if self.model:
-                try:
-                    return await self._call_gemini(prompt, temperature, max_tokens)
-                except Exception as gemini_error:
-                    logger.error(f"Gemini call failed: {gemini_error}")
-                    # Re-raise with user-friendly message
-                    if "API key" in str(gemini_error).lower() or "authentication" in str(gemini_error).lower():
-                        raise Exception("AI service authentication failed. Please check the API key configuration.")
-                    elif "rate limit" in str(gemini_error).lower() or "quota" in str(gemini_error).lower():
-                        raise Exception("AI service rate limit exceeded. Please try again in a few minutes.")
-                    elif "network" in str(gemini_error).lower() or "connection" in str(gemini_error).lower():
-                        raise Exception("Unable to connect to AI service. Please check your internet connection and try again.")
-                    else:
-                        raise Exception(f"AI service temporarily unavailable. Please try again later.")
+💡 **Hackathon Strategy Tips**
+[Brief tips]
+
+ABSOLUTELY CRITICAL: Use the exact DESC:, TECH:, IMPL:, DIFF:, IMPACT:, TIME: format for EVERY project. No exceptions."""
+
+class PromptBuilder:
+    """Assembles agent prompts within an input-token budget.
+
+    A prompt is a list of parts, each with a priority. Instruction sections that
+    repeat or conflict with the built-in format are dropped, as are empty profile
+    fields. If the estimate is still over budget, optional parts are removed,
+    lowest priority first.
+    """
+
+    ESSENTIAL, HIGH, MEDIUM, LOW = 0, 1, 2, 3
+    # Roughly how BPE tokenizers split text: short words, 3-digit groups and symbols are one token each
+    TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+    # Headings of instruction sections that specify the output layout, e.g. "RESPONSE FORMAT:"
+    FORMAT_HEADER = re.compile(r"((response|output)\s+)?format\b", re.IGNORECASE)
+
+    def __init__(self, max_input_tokens: int = 1000):
+        self.max_input_tokens = max_input_tokens
+        self.builds = 0
+        self.tokens_total = 0
+        self.tokens_max = 0
+        self.parts_dropped = 0
+        self.over_budget = 0
+
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        """Local, tokenizer-free estimate of a text's input tokens"""
+        return sum(1 + len(piece) // 6 if piece.isalpha() else 1 for piece in cls.TOKEN_PATTERN.findall(text))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_input_tokens": self.max_input_tokens,
+            "prompts": self.builds,
+            "avg_tokens": round(self.tokens_total / self.builds, 1) if self.builds else None,
+            "max_tokens": self.tokens_max,
+            "parts_dropped": self.parts_dropped,
+            "over_budget": self.over_budget,
+        }
+
+    def build(self, instructions: str, profile_data: Dict[str, Any],
+              max_input_tokens: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Return the prompt for an agent and profile, and its usage for record().
+
+        Building has no side effects: prompts are also built just to look up
+        cached answers, and only prompts actually sent should be counted.
+        """
+        budget = max_input_tokens or self.max_input_tokens
+        parts = self._instruction_parts(instructions) + self._profile_parts(profile_data)
+        parts.append((self.ESSENTIAL, RECOMMENDATION_FORMAT))
+        sizes = [self.estimate_tokens(text) for _, text in parts]
+        keep = [True] * len(parts)
+        tokens = sum(sizes)
+        # Drop optional parts, lowest priority first and later parts before earlier ones
+        for priority in (self.LOW, self.MEDIUM, self.HIGH):
+            for index in reversed(range(len(parts))):
+                if tokens <= budget:
+                    break
+                if parts[index][0] == priority:
+                    keep[index] = False
+                    tokens -= sizes[index]
+
+        prompt = "\n\n".join(text for (_, text), kept in zip(parts, keep) if kept)
+        return prompt, {"tokens": tokens, "budget": budget, "dropped": keep.count(False)}
+
+    def record(self, usage: Dict[str, Any]):
+        """Count a prompt that is being sent to the model"""
+        self.builds += 1
+        self.tokens_total += usage["tokens"]
+        self.tokens_max = max(self.tokens_max, usage["tokens"])
+        self.parts_dropped += usage["dropped"]
+        if usage["tokens"] > usage["budget"]:
+            self.over_budget += 1
+            logger.warning(f"Prompt needs ~{usage['tokens']} tokens even after compaction (budget {usage['budget']})")
+
+    def _instruction_parts(self, instructions: str) -> List[Tuple[int, str]]:
+        """Split instructions into sections, dropping repeats and any output-format section.
+
+        A section starts at a paragraph beginning with a letter; paragraphs that start
+        with a bullet, emoji or markup continue the current one.
+        """
+        sections: List[List[str]] = []
+        for paragraph in re.split(r"\n\s*\n", instructions.strip()):
+            paragraph = "\n".join(line.strip() for line in paragraph.strip().splitlines())
+            if not paragraph:
+                continue
+            if sections and not paragraph[0].isalnum():
+                sections[-1].append(paragraph)
             else:
-                raise Exception("AI service is not configured. Please check your Gemini API key configuration.")
+                sections.append([paragraph])
+
+        parts, seen = [], set()
+        for index, section in enumerate(sections):
+            header = section[0].splitlines()[0]
+            normalized = " ".join(" ".join(section).split()).lower()
+            # RECOMMENDATION_FORMAT is what the UI parses, so it wins over the instructions' own format
+            if self.FORMAT_HEADER.match(header) or normalized in seen:
+                continue
+            seen.add(normalized)
+            parts.append((self.HIGH if index == 0 else self.MEDIUM, "\n\n".join(section)))
+        return parts
 
-        except Exception as e:
-            logger.error(f"AI agent call failed: {e}")
-            # Re-raise the exception to be handled by the calling function
-            raise e
+    @staticmethod
+    def _block(title: str, fields: List[Tuple[str, Any]]) -> Optional[str]:
+        """A titled block of "Label: value" lines, skipping empty values"""
+        lines = [f"{label}: {value}" for label, value in fields if value not in (None, "", [])]
+        return "\n".join([title] + lines) if lines else None
 
-    def _create_agent_prompt(self, instructions: str, profile_data: Dict[str, Any]) -> str:
-        """Create a detailed prompt for the AI agent with comprehensive profile analysis"""
+    def _profile_parts(self, profile_data: Dict[str, Any]) -> List[Tuple[int, str]]:
         username = profile_data.get('username', 'Unknown')
         languages = profile_data.get('languages', [])
-        repos = profile_data.get('repos', 0)
-        followers = profile_data.get('followers', 0)
-        bio = profile_data.get('bio', '')
-        company = profile_data.get('company', '')
-        recent_repos = profile_data.get('recent_repos', [])
-
-        # Enhanced data
         repo_analysis = profile_data.get('repo_analysis', {})
         activity_analysis = profile_data.get('activity_analysis', {})
         expertise_level = profile_data.get('expertise_level', 'intermediate')
@@ -464,148 +2203,606 @@ class AIAgentClient:
         collaboration_style = profile_data.get('collaboration_style', 'mixed')
         recent_activity_score = profile_data.get('recent_activity_score', 0)
         project_complexity_preference = profile_data.get('project_complexity_preference', 'intermediate')
+        frameworks = repo_analysis.get('frameworks_used', [])
+
+        blocks = [
+            (self.HIGH, self._block("👤 BASIC INFO:", [
+                ("Username", username),
+                ("Bio", profile_data.get('bio')),
+                ("Company", profile_data.get('company')),
+                ("Public Repositories", profile_data.get('repos', 0)),
+                ("Followers", profile_data.get('followers', 0)),
+            ])),
+            (self.HIGH, self._block("💻 TECHNICAL PROFILE:", [
+                ("Primary Languages", ', '.join(languages[:8])),
+                ("Expertise Level", expertise_level),
+                ("Technology Diversity", f"{len(languages)} different languages" if languages else None),
+                ("Recent Repositories", ', '.join(profile_data.get('recent_repos', [])[:5])),
+            ])),
+            (self.MEDIUM, self._block("🏆 REPOSITORY ANALYSIS:", [
+                ("Total Stars Earned", repo_analysis.get('total_stars', 0)),
+                ("Total Forks", repo_analysis.get('total_forks', 0)),
+                ("Project Complexity Preference", project_complexity_preference),
+                ("Popular Topics", ', '.join(repo_analysis.get('popular_topics', [])[:5])),
+                ("Frameworks Used", ', '.join(frameworks)),
+                ("Project Types", ', '.join(repo_analysis.get('project_types', []))),
+            ])),
+            (self.LOW, self._block("📊 ACTIVITY PATTERNS:", [
+                ("Recent Activity Score", f"{recent_activity_score}/100"),
+                ("Activity Type", activity_analysis.get('activity_type', 'moderate')),
+                ("Collaboration Style", collaboration_style),
+                ("Recent Activity", 'Yes' if repo_analysis.get('recent_activity', False) else 'No'),
+            ])),
+            (self.MEDIUM, f"🎯 PREFERRED DOMAINS:\n{', '.join(preferred_domains)}" if preferred_domains else None),
+        ]
+
+        goals = [
+            f"Match the user's expertise level ({expertise_level})",
+            f"Leverage their strongest languages: {', '.join(languages[:3])}" if languages else None,
+            f"Align with their preferred domains: {', '.join(preferred_domains[:3])}" if preferred_domains else None,
+            f"Consider their collaboration style: {collaboration_style}",
+            f"Match their project complexity preference: {project_complexity_preference}",
+            f"Build upon their existing experience with: {', '.join(frameworks[:3])}" if frameworks else None,
+        ]
+        goals = [goal for goal in goals if goal]
+        task = "\n".join(
+            ["TASK:", "Based on this GitHub profile analysis, generate 5 highly personalized and creative "
+                      "hackathon project recommendations that:", ""]
+            + [f"{number}. {goal}" for number, goal in enumerate(goals, 1)]
+            + ["", f"Make each recommendation unique and exciting, considering their {recent_activity_score}/100 "
+                   f"activity score and {repo_analysis.get('total_stars', 0)} total stars earned."]
+        )
+        return ([(self.ESSENTIAL, "COMPREHENSIVE GITHUB PROFILE ANALYSIS:")]
+                + [(priority, text) for priority, text in blocks if text]
+                + [(self.ESSENTIAL, task)])
+
+class LLMAdmissionController:
+    """Caps concurrent LLM generations at max_concurrent_agents.
+
+    Callers beyond the limit wait in a priority queue (interactive before
+    background); once max_queue callers are waiting, new ones are rejected
+    immediately instead of piling onto the provider's quota.
+    """
+
+    def __init__(self, max_concurrent: int = 3, max_queue: int = 50):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waits = deque(maxlen=500)
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = itertools.count()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        queued = [priority for priority, _, future in self._waiters if not future.done()]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "queue_depth": len(queued),
+            "queued_interactive": queued.count(PRIORITY_INTERACTIVE),
+            "queued_background": queued.count(PRIORITY_BACKGROUND),
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds": {
+                "avg": round(sum(waits) / len(waits), 4),
+                "p95": round(waits[int(0.95 * (len(waits) - 1))], 4),
+                "max": round(waits[-1], 4),
+            } if waits else None,
+        }
 
-        prompt = f"""
-{instructions}
-
-COMPREHENSIVE GITHUB PROFILE ANALYSIS:
-
-👤 BASIC INFO:
-Username: {username}
-Bio: {bio}
-Company: {company}
-Public Repositories: {repos}
-Followers: {followers}
-
-💻 TECHNICAL PROFILE:
-Primary Languages: {', '.join(languages[:8])}
-Expertise Level: {expertise_level}
-Technology Diversity: {len(languages)} different languages
-Recent Repositories: {', '.join(recent_repos[:5])}
-
-🏆 REPOSITORY ANALYSIS:
-Total Stars Earned: {repo_analysis.get('total_stars', 0)}
-Total Forks: {repo_analysis.get('total_forks', 0)}
-Project Complexity Preference: {project_complexity_preference}
-Popular Topics: {', '.join(repo_analysis.get('popular_topics', [])[:5])}
-Frameworks Used: {', '.join(repo_analysis.get('frameworks_used', []))}
-Project Types: {', '.join(repo_analysis.get('project_types', []))}
-
-📊 ACTIVITY PATTERNS:
-Recent Activity Score: {recent_activity_score}/100
-Activity Type: {activity_analysis.get('activity_type', 'moderate')}
-Collaboration Style: {collaboration_style}
-Recent Activity: {'Yes' if repo_analysis.get('recent_activity', False) else 'No'}
-
-🎯 PREFERRED DOMAINS:
-{', '.join(preferred_domains) if preferred_domains else 'General Development'}
-
-TASK:
-Based on this comprehensive GitHub profile analysis, generate 5 highly personalized and creative hackathon project recommendations that:
-
-1. Match the user's expertise level ({expertise_level})
-2. Leverage their strongest languages: {', '.join(languages[:3])}
-3. Align with their preferred domains: {', '.join(preferred_domains[:3]) if preferred_domains else 'versatile projects'}
-4. Consider their collaboration style: {collaboration_style}
-5. Match their project complexity preference: {project_complexity_preference}
-6. Build upon their existing experience with: {', '.join(repo_analysis.get('frameworks_used', [])[:3])}
-
-Make each recommendation unique and exciting, considering their {recent_activity_score}/100 activity score and {repo_analysis.get('total_stars', 0)} total stars earned.
-
-CRITICAL FORMATTING REQUIREMENTS - FOLLOW EXACTLY:
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        """Hold one generation slot for the duration of the block"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE):
+        started = time.monotonic()
+        if self.active < self.max_concurrent and not self.queue_depth:
+            self.active += 1
+        else:
+            if self.queue_depth >= self.max_queue:
+                self.rejected += 1
+                raise Exception("AI service is busy. Please try again in a moment.")
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            try:
+                # release() hands its slot straight to us, so active is already counted
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release()
+                raise
+        self.admitted += 1
+        self.waits.append(time.monotonic() - started)
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
 
-📊 **Profile Analysis Summary**
-[Brief analysis of the user's skills and experience]
+class AIAgentClient:
+    """Client for communicating with AI models via Gemini API"""
 
-🚀 **Top 5 Hackathon Project Recommendations**
+    def __init__(self, gateway_url: str, recommendation_cache: Optional[TieredCache] = None,
+                 config: Optional[Dict[str, Any]] = None, admission: Optional[LLMAdmissionController] = None,
+                 prompt_builder: Optional[PromptBuilder] = None):
+        self.gateway_url = gateway_url
+        self.recommendation_cache = recommendation_cache
+        self.admission = admission or LLMAdmissionController()
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.model_name = 'gemini-1.5-flash'
+        self.config = config or {}
+        self.base_url = self.config.get('base_url', 'https://generativelanguage.googleapis.com/v1beta')
+        # Generations are plain REST calls on a pooled session, so none of them holds a thread
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Configure Gemini API
+        self.gemini_api_key = os.getenv('GEMINI_API_KEY')
+        if not self.gemini_api_key:
+            logger.warning("GEMINI_API_KEY not found, will use fallback responses")
 
-1. 🎯 **[Project Title]**
-DESC: [Clear 2-3 sentence description of what the project does]
-TECH: [Comma-separated list of specific technologies]
-IMPL: [Step-by-step implementation approach]
-DIFF: [Beginner/Intermediate/Advanced]
-IMPACT: [Problem it solves and value]
-TIME: [Hours estimate like "24-36 hours"]
+    async def start(self):
+        """Open the shared, connection-pooled HTTP session for Gemini"""
+        if self.session is not None and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.config.get('pool_size', 200),
+            ttl_dns_cache=self.config.get('dns_cache_ttl', 300),
+            keepalive_timeout=self.config.get('keepalive_timeout', 30),
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, opening it lazily outside the app lifespan"""
+        if self.session is None or self.session.closed:
+            await self.start()
+        return self.session
+
+    async def call_agent(self, agent_config: Dict[str, Any], profile_data: Dict[str, Any], fresh: bool = False,
+                         priority: int = PRIORITY_INTERACTIVE) -> str:
+        """Call an AI agent with the given configuration and data.
+
+        Identical prompts are answered from the recommendation cache unless `fresh`;
+        generations wait for an admission slot at the given priority.
+        """
+        try:
+            prompt, temperature, max_tokens, usage = self._generation_request(agent_config, profile_data)
+            cache_key = self._cache_key(profile_data.get('username', ''), prompt, temperature, max_tokens)
+            if self.recommendation_cache is not None and not fresh:
+                cached = await self.recommendation_cache.get(cache_key)
+                if cached is not None:
+                    return cached
 
-2. 🎯 **[Project Title]**
-DESC: [Description]
-TECH: [Technologies]
-IMPL: [Implementation]
-DIFF: [Difficulty]
-IMPACT: [Impact]
-TIME: [Time estimate]
+            # Try Gemini API
+            if self.gemini_api_key:
+                self._record_prompt(profile_data, usage)
+                async with self.admission.slot(priority):
+                    try:
+                        recommendations = await self._call_gemini(prompt, temperature, max_tokens)
+                    except asyncio.TimeoutError:
+                        raise
+                    except Exception as gemini_error:
+                        logger.error(f"Gemini call failed: {gemini_error}")
+                        raise self._friendly_error(gemini_error)
+                if self.recommendation_cache is not None:
+                    await self.recommendation_cache.set(cache_key, recommendations)
+                return recommendations
+            else:
+                raise Exception("AI service is not configured. Please check your Gemini API key configuration.")
 
-[Continue for projects 3-5 with EXACT same format]
+        except Exception as e:
+            logger.error(f"AI agent call failed: {e}")
+            # Re-raise the exception to be handled by the calling function
+            raise e
 
-💡 **Hackathon Strategy Tips**
-[Brief tips]
+    async def stream_agent(self, agent_config: Dict[str, Any], profile_data: Dict[str, Any], fresh: bool = False,
+                           priority: int = PRIORITY_INTERACTIVE):
+        """Like call_agent, but yield the text in chunks as Gemini generates it.
+
+        A cached answer is yielded whole; a completed generation is cached.
+        """
+        prompt, temperature, max_tokens, usage = self._generation_request(agent_config, profile_data)
+        cache_key = self._cache_key(profile_data.get('username', ''), prompt, temperature, max_tokens)
+        if self.recommendation_cache is not None and not fresh:
+            cached = await self.recommendation_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        if not self.gemini_api_key:
+            raise Exception("AI service is not configured. Please check your Gemini API key configuration.")
+        self._record_prompt(profile_data, usage)
+
+        chunks = []
+        async with self.admission.slot(priority):
+            try:
+                async with aclosing(self._stream_gemini(prompt, temperature, max_tokens)) as stream:
+                    async for text in stream:
+                        chunks.append(text)
+                        yield text
+            except asyncio.TimeoutError:
+                raise
+            except Exception as gemini_error:
+                logger.error(f"Gemini streaming call failed: {gemini_error}")
+                raise self._friendly_error(gemini_error)
+        if not chunks:
+            raise Exception("No response text generated")
+        if self.recommendation_cache is not None:
+            await self.recommendation_cache.set(cache_key, "".join(chunks))
+
+    @staticmethod
+    def _friendly_error(gemini_error: Exception) -> Exception:
+        """Map a Gemini failure to a user-friendly message"""
+        if "api key" in str(gemini_error).lower() or "authentication" in str(gemini_error).lower():
+            return Exception("AI service authentication failed. Please check the API key configuration.")
+        elif "rate limit" in str(gemini_error).lower() or "quota" in str(gemini_error).lower():
+            return Exception("AI service rate limit exceeded. Please try again in a few minutes.")
+        elif "network" in str(gemini_error).lower() or "connection" in str(gemini_error).lower():
+            return Exception("Unable to connect to AI service. Please check your internet connection and try again.")
+        else:
+            return Exception(f"AI service temporarily unavailable. Please try again later.")
+
+    async def peek_recommendations(self, agent_config: Dict[str, Any],
+                                   profile_data: Dict[str, Any]) -> Optional[Tuple[float, str, bool]]:
+        """Cached (stored_at, recommendations, stale) for this request, including stale entries"""
+        if self.recommendation_cache is None:
+            return None
+        prompt, temperature, max_tokens, _ = self._generation_request(agent_config, profile_data)
+        return await self.recommendation_cache.get_entry(
+            self._cache_key(profile_data.get('username', ''), prompt, temperature, max_tokens), allow_stale=True)
+
+    def _generation_request(self, agent_config: Dict[str, Any], profile_data: Dict[str, Any]):
+        """Build the (prompt, temperature, max_tokens, prompt usage) for an agent call"""
+        # Extract agent configuration
+        instructions = agent_config.get('instructions', '')
+        temperature = agent_config.get('parameters', {}).get('temperature', 0.7)
+        max_tokens = agent_config.get('parameters', {}).get('max_tokens', 1500)
+
+        # Create the prompt for the AI agent
+        prompt, usage = self._create_agent_prompt(instructions, profile_data,
+                                                  agent_config.get('parameters', {}).get('max_input_tokens'))
+        return prompt, temperature, max_tokens, usage
+
+    def _cache_key(self, username: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Content address of a generation request, prefixed by user for targeted invalidation"""
+        material = json.dumps([self.model_name, temperature, max_tokens, prompt])
+        return f"{username.lower()}:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+    def _create_agent_prompt(self, instructions: str, profile_data: Dict[str, Any],
+                             max_input_tokens: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """Create a detailed prompt for the AI agent with comprehensive profile analysis"""
+        return self.prompt_builder.build(instructions, profile_data, max_input_tokens)
 
-ABSOLUTELY CRITICAL: Use the exact DESC:, TECH:, IMPL:, DIFF:, IMPACT:, TIME: format for EVERY project. No exceptions.
-"""
-        return prompt
+    def _record_prompt(self, profile_data: Dict[str, Any], usage: Dict[str, Any]):
+        """Report the size of a prompt about to be generated from"""
+        self.prompt_builder.record(usage)
+        logger.info(f"Prompt for {profile_data.get('username', 'Unknown')}: ~{usage['tokens']} input tokens")
 
     async def _call_gemini(self, prompt: str, temperature: float, max_tokens: int) -> str:
         """Call Gemini API for AI generation"""
-        try:
-            # Configure generation parameters
-            generation_config = genai.types.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens,
-                candidate_count=1,
-            )
-
-            # Generate response using Gemini
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt,
-                generation_config=generation_config
-            )
-
-            if response.text:
-                return response.text
-            else:
-                raise Exception("No response text generated")
+        session = await self._get_session()
+        async with session.post(f"{self.base_url}/models/{self.model_name}:generateContent",
+                                json=self._gemini_payload(prompt, temperature, max_tokens),
+                                headers={'x-goog-api-key': self.gemini_api_key},
+                                timeout=self._gemini_timeout()) as response:
+            if response.status != 200:
+                raise await self._gemini_error(response)
+            result = await response.json()
+
+        text = self._candidate_text(result)
+        if text:
+            return text
+        else:
+            raise Exception("No response text generated")
+
+    async def _stream_gemini(self, prompt: str, temperature: float, max_tokens: int):
+        """Yield generated text as Gemini streams it back as Server-Sent Events"""
+        session = await self._get_session()
+        async with session.post(f"{self.base_url}/models/{self.model_name}:streamGenerateContent?alt=sse",
+                                json=self._gemini_payload(prompt, temperature, max_tokens),
+                                headers={'x-goog-api-key': self.gemini_api_key},
+                                timeout=self._gemini_timeout(stream=True)) as response:
+            if response.status != 200:
+                raise await self._gemini_error(response)
+            async for line in response.content:
+                if line.startswith(b"data:"):
+                    text = self._candidate_text(json_loads(line[5:].strip()))
+                    if text:
+                        yield text
+
+    @staticmethod
+    def _gemini_payload(prompt: str, temperature: float, max_tokens: int) -> Dict[str, Any]:
+        return {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": temperature, "maxOutputTokens": max_tokens, "candidateCount": 1},
+        }
 
+    def _gemini_timeout(self, stream: bool = False) -> aiohttp.ClientTimeout:
+        """Whole-request timeout within the request deadline; streams also fail after read_timeout seconds without a chunk"""
+        total = self.config.get('request_timeout', 60)
+        remaining = remaining_time()
+        if remaining is not None:
+            # A zero total would disable aiohttp's timeout entirely
+            total = max(0.001, min(total, remaining))
+        return aiohttp.ClientTimeout(
+            total=total,
+            connect=self.config.get('connect_timeout', 5),
+            sock_read=self.config.get('read_timeout', 30) if stream else None,
+        )
+
+    @staticmethod
+    def _candidate_text(result: Dict[str, Any]) -> str:
+        candidates = result.get('candidates') or [{}]
+        parts = (candidates[0].get('content') or {}).get('parts') or []
+        return "".join(part.get('text', '') for part in parts)
+
+    @staticmethod
+    async def _gemini_error(response: aiohttp.ClientResponse) -> Exception:
+        """Exception for a non-200 Gemini response, worded for _friendly_error"""
+        try:
+            message = ((await response.json(content_type=None)).get('error') or {}).get('message', '')
+        except (ValueError, aiohttp.ClientError):
+            message = ''
+        if response.status in (401, 403) or 'api key' in message.lower():
+            return Exception(f"Gemini authentication failed ({response.status}): {message}")
+        if response.status == 429:
+            return Exception(f"Gemini quota exceeded: {message}")
+        return Exception(f"Gemini API error ({response.status}): {message}")
+
+
+class Broadcast:
+    """Items of one async iterator, pumped by a task and replayed to every reader.
+
+    Readers that join late get everything produced so far, then follow along.
+    """
+
+    def __init__(self, source):
+        self.items: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source):
+        try:
+            async with aclosing(source) as items:
+                async for item in items:
+                    self.items.append(item)
+                    self._notify()
         except Exception as e:
-            logger.error(f"Gemini API call failed: {e}")
-            raise e
+            self.error = e
+        finally:
+            self.finished = True
+            self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def read(self):
+        index = 0
+        while True:
+            while index < len(self.items):
+                yield self.items[index]
+                index += 1
+            if self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one shared task.
+
+    Each caller awaits the task through a shield, so one caller going away
+    doesn't cancel the work for the others; the task is cancelled only when
+    its last waiter leaves. stream() does the same for async generators,
+    fanning every item out to all callers.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Any, list] = {}  # key -> [task, waiter count]
+        self.streams: Dict[Any, Broadcast] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self.calls) + len(self.streams), "leaders": self.leaders, "coalesced": self.coalesced}
+
+    async def do(self, key, fn):
+        call = self.calls.get(key)
+        if call is None:
+            call = [asyncio.create_task(fn()), 0]
+            self.calls[key] = call
+            call[0].add_done_callback(lambda _: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
 
+        call[1] += 1
+        try:
+            return await asyncio.shield(call[0])
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not call[0].done():
+                # Nobody is waiting any more; don't hand a cancelled task to later callers
+                self._forget(key, call)
+                call[0].cancel()
+
+    def _forget(self, key, call):
+        if self.calls.get(key) is call:
+            del self.calls[key]
+
+    async def stream(self, key, fn):
+        """Yield the items of fn() - an async generator - shared with concurrent callers of the same key"""
+        broadcast = self.streams.get(key)
+        if broadcast is None:
+            broadcast = Broadcast(fn())
+            self.streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._forget_stream(key, broadcast))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
 
+        broadcast.readers += 1
+        try:
+            async with aclosing(broadcast.read()) as items:
+                async for item in items:
+                    yield item
+        finally:
+            broadcast.readers -= 1
+            if broadcast.readers == 0 and not broadcast.task.done():
+                self._forget_stream(key, broadcast)
+                broadcast.task.cancel()
+
+    def _forget_stream(self, key, broadcast):
+        if self.streams.get(key) is broadcast:
+            del self.streams[key]
 
 class AgentService:
     def __init__(self):
         self.config = AgentConfig()
         self.gateway_url = os.getenv('MCPGATEWAY_URL', 'mcp-gateway:8811')
-        self.github_analyzer = GitHubAnalyzer()
-        self.ai_client = AIAgentClient(self.gateway_url)
+        # End-to-end budget for one analysis, shared by the GitHub and Gemini stages
+        self.timeout_seconds = self.config.config.get('timeout_seconds', 30)
+        cache_config = self.config.config.get('cache', {})
+        self.swr_config = cache_config.get('stale_while_revalidate', {})
+        max_stale = self.swr_config.get('max_stale', 3600) if self.swr_config.get('enabled', False) else 0
+        # Agent instructions spell out the section headers recommendations repeat
+        self.cache_codec = CacheCodec.from_config(
+            cache_config.get('compression', {}),
+            samples=[agent.get('instructions', '') for agent in self.config.agents.values()]
+                    + [json_dumps(DICTIONARY_SAMPLE_PROFILE).decode()],
+        )
+        self.profile_cache = TieredCache.from_config(cache_config.get('profile', {}), table="profiles",
+                                                     max_stale=max_stale, codec=self.cache_codec)
+        negative_config = cache_config.get('negative', {})
+        self.negative_cache = MemoryCache(
+            max_entries=negative_config.get('max_entries', 10000),
+            ttl=negative_config.get('ttl', 300),
+        )
+        self.github_analyzer = GitHubAnalyzer(
+            config=self.config.config.get('github', {}),
+            requests_per_hour=self.config.config.get('rate_limits', {}).get('github_api', 5000),
+            profile_cache=self.profile_cache,
+            negative_cache=self.negative_cache,
+        )
+        self.recommendation_cache = TieredCache.from_config(cache_config.get('recommendations', {}),
+                                                            table="recommendations", max_stale=max_stale,
+                                                            codec=self.cache_codec)
+        self.ai_client = AIAgentClient(
+            self.gateway_url,
+            recommendation_cache=self.recommendation_cache,
+            config=self.config.config.get('gemini', {}),
+            admission=LLMAdmissionController(
+                max_concurrent=self.config.config.get('max_concurrent_agents', 3),
+                max_queue=self.config.config.get('max_queued_agents', 50),
+            ),
+            prompt_builder=PromptBuilder(
+                max_input_tokens=self.config.config.get('prompt', {}).get('max_input_tokens', 1000),
+            ),
+        )
+        self.single_flight = SingleFlight()
+
+        # Background refreshes for stale-while-revalidate, one per key
+        self.refresh_semaphore = asyncio.Semaphore(self.swr_config.get('refresh_concurrency', 2))
+        self.refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def startup(self):
+        """Acquire long-lived resources for the app lifespan"""
+        await self.github_analyzer.start()
+        await self.ai_client.start()
+
+    async def shutdown(self):
+        """Release long-lived resources on app shutdown"""
+        for task in list(self.refreshing.values()):
+            task.cancel()
+        await asyncio.gather(*self.refreshing.values(), return_exceptions=True)
+        await self.github_analyzer.close()
+        await self.ai_client.close()
+        self.profile_cache.close()
+        self.recommendation_cache.close()
+
+    async def cache_stats(self) -> Dict[str, Any]:
+        """Per-tier statistics for the profile, recommendation and negative caches"""
+        return {
+            "profile": await self.profile_cache.stats(),
+            "recommendations": await self.recommendation_cache.stats(),
+            "negative": {"memory": self.negative_cache.stats(), "persistent": None},
+        }
+
+    async def invalidate_user(self, username: str):
+        """Forget everything cached about one user"""
+        key = username.strip().lower()
+        await self.profile_cache.delete(key)
+        # Recommendation keys are prefixed with the username
+        await self.recommendation_cache.delete_prefix(f"{key}:")
+        self.negative_cache.delete(key)
+        if self.github_analyzer.snapshots is not None:
+            self.github_analyzer.snapshots.delete(key)
+
+    async def invalidate_cache(self, name: str, prefix: str = "", tier: str = "all") -> Dict[str, int]:
+        """Drop keys starting with prefix from a cache tier; an empty prefix flushes it"""
+        if name == "negative":
+            return {"memory": self.negative_cache.delete_prefix(prefix)} if tier in ("all", "memory") else {}
+        cache = self.profile_cache if name == "profile" else self.recommendation_cache
+        return await cache.delete_prefix(prefix, tier)
     
-    async def analyze_github_profile(self, username: str, agent_name: str = "hackathon_recommender") -> AnalysisResponse:
-        """Analyze a GitHub profile and generate hackathon recommendations"""
+    async def analyze_github_profile(self, username: str, agent_name: str = "hackathon_recommender",
+                                     fresh: bool = False, priority: int = PRIORITY_INTERACTIVE,
+                                     allow_stale: bool = True) -> AnalysisResponse:
+        """Analyze a GitHub profile and generate hackathon recommendations.
+
+        Concurrent requests for the same user and agent share a single analysis.
+        Work still outstanding after timeout_seconds is cancelled. With
+        allow_stale=False, expired entries are regenerated before returning
+        rather than served while a background refresh runs.
+        """
+        key = ((username or '').strip().lower(), agent_name, fresh, allow_stale)
         try:
-            # Validate username
-            if not username or not username.strip():
-                raise Exception("Username cannot be empty. Please enter a valid GitHub username.")
-
-            username = username.strip()
-
-            # Basic username validation
-            if len(username) > 39:  # GitHub username max length
-                raise Exception("Username is too long. GitHub usernames must be 39 characters or less.")
-
-            if not username.replace('-', '').replace('_', '').isalnum():
-                raise Exception("Invalid username format. GitHub usernames can only contain letters, numbers, hyphens, and underscores.")
+            return await run_with_deadline(
+                self._deadline(),
+                self.single_flight.do(key, lambda: self._analyze(username, agent_name, fresh, priority, allow_stale)))
+        except asyncio.TimeoutError:
+            logger.error(f"Analysis timed out for {username} after {self.timeout_seconds}s")
+            return self._timeout_response(agent_name)
+
+    async def _analyze(self, username: str, agent_name: str, fresh: bool, priority: int,
+                       allow_stale: bool = True) -> AnalysisResponse:
+        """Run one analysis: fetch the profile, then generate recommendations"""
+        try:
+            username, agent_config = self._validate(username, agent_name)
 
-            agent_config = self.config.agents.get(agent_name, {})
-            if not agent_config:
-                raise Exception(f"Agent {agent_name} not found in configuration")
+            if self.swr_config.get('enabled', False) and not fresh and allow_stale:
+                cached_response = await self._serve_cached(username, agent_name, agent_config)
+                if cached_response is not None:
+                    return cached_response
 
             logger.info(f"Starting analysis for {username} with agent {agent_name}")
 
             # Get real GitHub profile data
-            profile = await self.github_analyzer.get_user_profile(username)
+            profile = await self.github_analyzer.get_user_profile(username, priority=priority, check_negative=False)
 
             # Generate AI-powered personalized recommendations
-            recommendations = await self.ai_client.call_agent(agent_config, profile)
+            recommendations = await self.ai_client.call_agent(agent_config, profile, fresh=fresh, priority=priority)
             
             return AnalysisResponse(
                 success=True,
@@ -614,6 +2811,9 @@ class AgentService:
                 profile=profile
             )
             
+        except asyncio.TimeoutError as e:
+            logger.error(f"Analysis timed out for {username}: {e!r}")
+            return self._timeout_response(agent_name, str(e))
         except Exception as e:
             logger.error(f"Analysis failed for {username}: {e}")
             return AnalysisResponse(
@@ -621,14 +2821,170 @@ class AgentService:
                 agent=agent_name,
                 error=str(e)
             )
-    
 
+    async def stream_analysis(self, username: str, agent_name: str = "hackathon_recommender", fresh: bool = False,
+                              priority: int = PRIORITY_INTERACTIVE):
+        """Analyze a profile, yielding (event, data) pairs as results become available.
+
+        Emits 'profile' once GitHub data is in, 'chunk' for each piece of generated
+        text, then 'done' - or 'error' at any point. Concurrent streams for the same
+        user and agent share one analysis, each receiving every event. The work runs
+        in its own task under the first request's deadline, so it is cancelled at
+        timeout_seconds or when the last client goes away.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            name, agent_config = self._validate(username, agent_name)
+            if self.swr_config.get('enabled', False) and not fresh:
+                cached_response = await self._serve_cached(name, agent_name, agent_config)
+                if cached_response is not None:
+                    events.put_nowait(("profile", cached_response.profile))
+                    events.put_nowait(("chunk", {"text": cached_response.recommendations}))
+                    events.put_nowait(("done", {"success": True, "agent": agent_name, "stale": cached_response.stale,
+                                                "age_seconds": cached_response.age_seconds}))
+                    return
+            logger.info(f"Starting streamed analysis for {name} with agent {agent_name}")
+            profile = await self.github_analyzer.get_user_profile(name, priority=priority, check_negative=False)
+            events.put_nowait(("profile", profile))
+            async for chunk in self.ai_client.stream_agent(agent_config, profile, fresh=fresh, priority=priority):
+                events.put_nowait(("chunk", {"text": chunk}))
+            events.put_nowait(("done", {"success": True, "agent": agent_name}))
+
+        async def run():
+            try:
+                await run_with_deadline(self._deadline(), produce())
+            except asyncio.TimeoutError as e:
+                logger.error(f"Streamed analysis timed out for {username}: {e!r}")
+                response = self._timeout_response(agent_name, str(e))
+                events.put_nowait(("error", {"success": False, "agent": agent_name,
+                                             "error": response.error, "error_code": response.error_code}))
+            except Exception as e:
+                logger.error(f"Streamed analysis failed for {username}: {e}")
+                events.put_nowait(("error", {"success": False, "agent": agent_name, "error": str(e)}))
+            finally:
+                events.put_nowait(None)
+
+        async def analysis():
+            task = asyncio.create_task(run())
+            try:
+                while (event := await events.get()) is not None:
+                    yield event
+            finally:
+                task.cancel()
+
+        key = ((username or '').strip().lower(), agent_name, fresh)
+        async with aclosing(self.single_flight.stream(key, analysis)) as shared:
+            async for event in shared:
+                yield event
+
+    def _deadline(self) -> float:
+        return asyncio.get_running_loop().time() + self.timeout_seconds
+
+    def _timeout_response(self, agent_name: str, message: str = "") -> AnalysisResponse:
+        """Structured error for an analysis that ran out of time"""
+        return AnalysisResponse(
+            success=False,
+            agent=agent_name,
+            error=message or f"Analysis timed out after {self.timeout_seconds} seconds. Please try again in a moment.",
+            error_code="timeout",
+        )
+
+    def _validate(self, username: str, agent_name: str) -> Tuple[str, Dict[str, Any]]:
+        """Return the cleaned username and agent config, raising user-facing errors"""
+        # Validate username
+        if not username or not username.strip():
+            raise Exception("Username cannot be empty. Please enter a valid GitHub username.")
+
+        username = username.strip()
+
+        # Repeat lookups of rejected or missing users are answered without any work
+        rejected = self.negative_cache.get(username.lower())
+        if rejected is not None:
+            raise Exception(rejected[1])
+
+        # Basic username validation
+        if len(username) > 39:  # GitHub username max length
+            raise self._reject(username, "Username is too long. GitHub usernames must be 39 characters or less.")
+
+        if not username.replace('-', '').replace('_', '').isalnum():
+            raise self._reject(username, "Invalid username format. GitHub usernames can only contain letters, numbers, hyphens, and underscores.")
+
+        agent_config = self.config.agents.get(agent_name, {})
+        if not agent_config:
+            raise Exception(f"Agent {agent_name} not found in configuration")
+        return username, agent_config
+
+    def _reject(self, username: str, message: str) -> Exception:
+        """Remember a rejected username in the negative cache"""
+        self.negative_cache.set(username.lower(), message)
+        return Exception(message)
+
+    async def _serve_cached(self, username: str, agent_name: str,
+                            agent_config: Dict[str, Any]) -> Optional[AnalysisResponse]:
+        """Answer from cache alone, accepting stale entries and refreshing them in the background"""
+        profile_entry = await self.github_analyzer.peek_profile(username)
+        if profile_entry is None:
+            return None
+        profile_stored_at, profile, profile_stale = profile_entry
+        recommendation_entry = await self.ai_client.peek_recommendations(agent_config, profile)
+        if recommendation_entry is None:
+            return None
+        recommendations_stored_at, recommendations, recommendations_stale = recommendation_entry
+
+        stale = profile_stale or recommendations_stale
+        if stale:
+            self._schedule_refresh(username, agent_name, agent_config)
+        return AnalysisResponse(
+            success=True,
+            agent=agent_name,
+            recommendations=recommendations,
+            profile=profile,
+            stale=stale,
+            age_seconds=round(time.time() - min(profile_stored_at, recommendations_stored_at), 1) if stale else None
+        )
+
+    def _schedule_refresh(self, username: str, agent_name: str, agent_config: Dict[str, Any]):
+        """Start at most one background refresh per user and agent"""
+        key = (username.lower(), agent_name)
+        if key in self.refreshing:
+            return
+        task = asyncio.create_task(self._refresh(username, agent_config))
+        self.refreshing[key] = task
+        task.add_done_callback(lambda _: self.refreshing.pop(key, None))
+
+    async def _refresh(self, username: str, agent_config: Dict[str, Any]):
+        """Re-fetch a profile and regenerate recommendations into the caches"""
+        async def regenerate():
+            profile = await self.github_analyzer.get_user_profile(
+                username, priority=PRIORITY_BACKGROUND, use_cache=False, check_negative=False)
+            await self.ai_client.call_agent(agent_config, profile, priority=PRIORITY_BACKGROUND)
+
+        async with self.refresh_semaphore:
+            try:
+                # A deadline of its own, not the one inherited from the request that scheduled it
+                await run_with_deadline(self._deadline(), regenerate())
+                logger.info(f"Refreshed stale analysis for {username}")
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {username}: {e}")
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients on startup and close them on shutdown"""
+    await agent_service.startup()
+    try:
+        yield
+    finally:
+        await agent_service.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Agents Hackathon Recommender",
     description="Backend service for analyzing GitHub profiles and recommending hackathon projects",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -651,7 +3007,18 @@ async def health_check():
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze_profile(request: AnalysisRequest):
     """Analyze a GitHub profile and generate hackathon recommendations"""
-    return await agent_service.analyze_github_profile(request.username, request.agent)
+    return await agent_service.analyze_github_profile(request.username, request.agent, fresh=request.fresh)
+
+@app.post("/analyze/stream")
+async def analyze_profile_stream(request: AnalysisRequest):
+    """Stream an analysis as Server-Sent Events: profile, recommendation chunks, then done or error"""
+    async def events():
+        async for event, data in agent_service.stream_analysis(request.username, request.agent, fresh=request.fresh):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    # Ask proxies not to buffer, so each event reaches the client as it is sent
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.get("/agents")
 async def list_agents():
@@ -663,6 +3030,62 @@ async def root():
     """Root endpoint"""
     return {"message": "Hacksy - AI Agents Hackathon Recommender API", "version": "1.0.0"}
 
+CACHE_NAMES = ("profile", "recommendations", "negative")
+CACHE_TIERS = ("all", "memory", "persistent")
+
+def require_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """Admin endpoints need the ADMIN_API_KEY in an X-Admin-Key header; unset disables them"""
+    admin_key = os.getenv('ADMIN_API_KEY')
+    if not admin_key:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, admin_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+admin = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_key)])
+
+@admin.get("/cache")
+async def cache_stats():
+    """Hit ratios, sizes, evictions and entry ages for every cache tier"""
+    return await agent_service.cache_stats()
+
+@admin.get("/llm")
+async def llm_stats():
+    """Concurrency, queue depth and wait times of LLM admission control, and prompt sizes"""
+    return {
+        "admission": agent_service.ai_client.admission.stats(),
+        "prompts": agent_service.ai_client.prompt_builder.stats(),
+    }
+
+@admin.get("/github")
+async def github_stats():
+    """GitHub quota per token, scheduler queue depth, 200/304 counts and retries"""
+    return agent_service.github_analyzer.stats()
+
+@admin.get("/requests")
+async def request_stats():
+    """Coalesced analyses and background refreshes in flight"""
+    return {
+        "coalescing": agent_service.single_flight.stats(),
+        "refreshing": len(agent_service.refreshing),
+    }
+
+@admin.delete("/cache/users/{username}")
+async def invalidate_user(username: str):
+    """Drop a user's profile, recommendations and negative entry"""
+    await agent_service.invalidate_user(username)
+    return {"invalidated": username}
+
+@admin.delete("/cache/{name}")
+async def invalidate_cache(name: str, prefix: str = "", tier: str = "all"):
+    """Drop keys starting with prefix from a cache, or flush a tier when no prefix is given"""
+    if name not in CACHE_NAMES:
+        raise HTTPException(status_code=404, detail=f"Unknown cache '{name}'. Choose one of: {', '.join(CACHE_NAMES)}")
+    if tier not in CACHE_TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown tier '{tier}'. Choose one of: {', '.join(CACHE_TIERS)}")
+    return {"removed": await agent_service.invalidate_cache(name, prefix, tier)}
+
+app.include_router(admin)
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 7777))  # Render uses PORT env var
     uvicorn.run(
@@ -670,5 +3093,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=port,
         reload=False,
+        # Set cache.*.shared_path so workers share one cache
+        workers=int(os.getenv("WEB_CONCURRENCY", 1)),
         log_level="info"
     )
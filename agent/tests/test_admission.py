@@ -0,0 +1,79 @@
+"""
+LLM admission control: slot handoff, priority order and rejection when full.
+
+Run from the agent directory:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, LLMAdmissionController  # noqa: E402
+
+
+class AdmissionTest(unittest.IsolatedAsyncioTestCase):
+    async def test_interactive_waiter_is_admitted_before_earlier_background_one(self):
+        admission = LLMAdmissionController(max_concurrent=1, max_queue=2)
+        await admission.acquire()
+        order = []
+
+        async def generate(name, priority):
+            async with admission.slot(priority):
+                order.append(name)
+
+        background = asyncio.create_task(generate("background", PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(generate("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        self.assertEqual(admission.stats()["queue_depth"], 2)
+
+        admission.release()
+        await asyncio.gather(background, interactive)
+        self.assertEqual(order, ["interactive", "background"])
+        self.assertEqual(admission.active, 0)
+
+    async def test_caller_beyond_the_queue_is_rejected_immediately(self):
+        admission = LLMAdmissionController(max_concurrent=1, max_queue=1)
+        await admission.acquire()
+        queued = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+
+        with self.assertRaisesRegex(Exception, "busy"):
+            await asyncio.wait_for(admission.acquire(), timeout=1)
+        self.assertEqual(admission.rejected, 1)
+
+        admission.release()
+        await queued
+        self.assertEqual(admission.active, 1)
+        admission.release()
+        self.assertEqual(admission.active, 0)
+
+    async def test_cancelled_waiter_gives_its_slot_back(self):
+        admission = LLMAdmissionController(max_concurrent=1, max_queue=1)
+        await admission.acquire()
+
+        # Cancelled while still queued
+        queued = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        admission.release()
+        self.assertEqual(admission.active, 0)
+
+        # Cancelled after release() handed it the slot but before it resumed
+        await admission.acquire()
+        queued = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        admission.release()
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        self.assertEqual(admission.active, 0)
+        self.assertEqual(admission.queue_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
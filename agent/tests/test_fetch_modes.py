@@ -0,0 +1,273 @@
+"""
+GitHub fetching against a local fake GitHub API: REST and GraphQL modes,
+credential failover, conditional requests and incremental refreshes.
+
+Run from the agent directory:
+    python -m unittest discover tests
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+import unittest
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import GitHubAnalyzer, GitHubTokenPool  # noqa: E402
+
+REPOS = [
+    {"name": "ml-toolkit", "description": "machine learning api", "language": "Python", "fork": False,
+     "stargazers_count": 12, "forks_count": 3, "size": 2048, "topics": ["machine-learning", "api"]},
+    {"name": "web-dash", "description": "react dashboard", "language": "JavaScript", "fork": False,
+     "stargazers_count": 4, "forks_count": 1, "size": 512, "topics": ["react"]},
+    {"name": "cli", "description": "command line tool", "language": "Go", "fork": True,
+     "stargazers_count": 0, "forks_count": 0, "size": 64, "topics": []},
+]
+
+
+def rate_headers(remaining: int = 4990) -> dict:
+    return {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+
+
+def rest_repo(repo, day):
+    timestamp = f"2026-09-{day:02d}T00:00:00Z"
+    return {**repo, "full_name": f"octo/{repo['name']}", "updated_at": timestamp, "pushed_at": timestamp}
+
+
+def graphql_repo(repo):
+    return {
+        "name": repo["name"],
+        "description": repo["description"],
+        "isFork": repo["fork"],
+        "stargazerCount": repo["stargazers_count"],
+        "forkCount": repo["forks_count"],
+        "diskUsage": repo["size"],
+        "updatedAt": repo["updated_at"],
+        "pushedAt": repo["pushed_at"],
+        "primaryLanguage": {"name": repo["language"]},
+        "repositoryTopics": {"nodes": [{"topic": {"name": topic}} for topic in repo["topics"]]},
+    }
+
+
+class FakeGitHub:
+    """The handful of REST and GraphQL endpoints GitHubAnalyzer calls.
+
+    Repos are served most recently updated first and paginated with Link
+    headers, events newest first; tokens in `exhausted_tokens` get a
+    rate-limited 403 and /users/{username} honours If-None-Match.
+    """
+
+    def __init__(self):
+        self.repos = [rest_repo(repo, 9 - index) for index, repo in enumerate(REPOS)]
+        self.events = []
+        for event_type in ["PushEvent"] * 3 + ["PullRequestEvent"]:
+            self.add_event(event_type)
+        self.graphql_status = 200
+        self.exhausted_tokens = set()
+        self.requests = 0
+
+    def add_event(self, event_type: str):
+        self.events.insert(0, {"id": str(len(self.events) + 1), "type": event_type,
+                               "created_at": "2026-10-01T00:00:00Z", "repo": {"name": "octo/ml-toolkit"}})
+
+    def sorted_repos(self):
+        return sorted(self.repos, key=lambda repo: repo["updated_at"], reverse=True)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/users/{username}", self.user)
+        app.router.add_get("/users/{username}/repos", self.list_repos)
+        app.router.add_get("/users/{username}/events/public", self.list_events)
+        app.router.add_post("/graphql", self.graphql)
+        return app
+
+    def rate_limited(self, request):
+        """Count the request; a 403 response if its token has no quota left"""
+        self.requests += 1
+        token = request.headers.get("Authorization", "").removeprefix("token ")
+        if token in self.exhausted_tokens:
+            return web.json_response({"message": "API rate limit exceeded"}, status=403, headers=rate_headers(0))
+        return None
+
+    async def user(self, request):
+        if (limited := self.rate_limited(request)) is not None:
+            return limited
+        if request.match_info["username"] != "octo":
+            return web.json_response({"message": "Not Found"}, status=404, headers=rate_headers())
+        body = {"login": "octo", "name": "Octo Cat", "bio": "builds things", "company": "GitHub",
+                "location": "Earth", "public_repos": len(self.repos), "followers": 42,
+                "following": 7, "created_at": "2015-01-01T00:00:00Z"}
+        etag = '"' + hashlib.sha256(json.dumps(body).encode()).hexdigest()[:16] + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={**rate_headers(), "ETag": etag})
+        return web.json_response(body, headers={**rate_headers(), "ETag": etag})
+
+    async def list_repos(self, request):
+        if (limited := self.rate_limited(request)) is not None:
+            return limited
+        per_page = int(request.query.get("per_page", 30))
+        page = int(request.query.get("page", 1))
+        repos = self.sorted_repos()
+        headers = rate_headers()
+        if page * per_page < len(repos):
+            headers["Link"] = f'<{request.url.update_query(page=page + 1)}>; rel="next"'
+        return web.json_response(repos[(page - 1) * per_page:page * per_page], headers=headers)
+
+    async def list_events(self, request):
+        if (limited := self.rate_limited(request)) is not None:
+            return limited
+        per_page = int(request.query.get("per_page", 30))
+        return web.json_response(self.events[:per_page], headers=rate_headers())
+
+    async def graphql(self, request):
+        self.requests += 1
+        headers = {**rate_headers(), "X-RateLimit-Resource": "graphql"}
+        if self.graphql_status != 200:
+            return web.json_response({"message": "Bad credentials"}, status=self.graphql_status, headers=headers)
+        login = (await request.json())["variables"]["login"]
+        if login != "octo":
+            return web.json_response({"data": {"user": None}, "errors": [{"type": "NOT_FOUND"}]}, headers=headers)
+        return web.json_response({"data": {"user": {
+            "name": "Octo Cat", "bio": "builds things", "company": "GitHub", "location": "Earth",
+            "createdAt": "2015-01-01T00:00:00Z",
+            "followers": {"totalCount": 42}, "following": {"totalCount": 7},
+            "repositories": {"totalCount": len(self.repos),
+                             "nodes": [graphql_repo(repo) for repo in self.sorted_repos()]},
+            "contributionsCollection": {"totalCommitContributions": 3, "totalPullRequestContributions": 1,
+                                        "totalIssueContributions": 0},
+        }}}, headers=headers)
+
+
+def shape(value):
+    """Keys and value types of a profile, recursively"""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    return type(value).__name__
+
+
+class FakeGitHubTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.github = FakeGitHub()
+        self.runner = web.AppRunner(self.github.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{self.runner.addresses[0][1]}"
+        self.analyzers = []
+
+    async def asyncTearDown(self):
+        for analyzer in self.analyzers:
+            await analyzer.close()
+        await self.runner.cleanup()
+
+    def analyzer(self, fetch_mode: str = "rest", **config) -> GitHubAnalyzer:
+        analyzer = GitHubAnalyzer(token="test-token", config={
+            "fetch_mode": fetch_mode,
+            "graphql_url": f"{self.base_url}/graphql",
+            "conditional_cache": {"enabled": False},
+            "incremental": {"enabled": False},
+            "resilience": {"retries": 0},
+            **config,
+        })
+        analyzer.base_url = self.base_url
+        self.analyzers.append(analyzer)
+        return analyzer
+
+
+class FetchModeTest(FakeGitHubTestCase):
+    async def test_modes_produce_the_same_profile(self):
+        rest = await self.analyzer("rest").get_user_profile("octo")
+        graphql = await self.analyzer("graphql").get_user_profile("octo")
+
+        self.assertEqual(shape(rest), shape(graphql))
+        for key in ("name", "bio", "repos", "followers", "following", "languages", "recent_repos",
+                    "expertise_level", "preferred_domains"):
+            self.assertEqual(rest[key], graphql[key], key)
+        self.assertEqual(rest["repo_analysis"], graphql["repo_analysis"])
+
+    async def test_graphql_uses_one_request(self):
+        analyzer = self.analyzer("graphql")
+        await analyzer.get_user_profile("octo")
+        self.assertEqual(self.github.requests, 1)
+        self.assertEqual(analyzer.stats()["tokens"]["test...oken"]["graphql_remaining"], 4990)
+
+    async def test_graphql_bad_token_is_not_reported_as_rate_limit(self):
+        self.github.graphql_status = 401
+        with self.assertRaisesRegex(Exception, "authentication failed"):
+            await self.analyzer("graphql").get_user_profile("octo")
+
+    async def test_missing_user(self):
+        for mode in ("rest", "graphql"):
+            with self.assertRaisesRegex(Exception, "not found"):
+                await self.analyzer(mode).get_user_profile("nobody")
+
+
+class CredentialPoolTest(FakeGitHubTestCase):
+    async def test_rate_limited_token_fails_over_to_healthy_one(self):
+        analyzer = self.analyzer(resilience={"retries": 2})
+        analyzer.credentials = GitHubTokenPool(["aaaa-token-1111", "bbbb-token-2222"])
+        self.github.exhausted_tokens.add("aaaa-token-1111")
+
+        profile = await analyzer.get_user_profile("octo")
+
+        self.assertEqual(profile["followers"], 42)
+        tokens = analyzer.stats()["tokens"]
+        self.assertGreaterEqual(tokens["aaaa...1111"]["rate_limited"], 1)
+        self.assertEqual(tokens["aaaa...1111"]["remaining"], 0)
+        self.assertEqual(tokens["bbbb...2222"]["rate_limited"], 0)
+        self.assertGreater(tokens["bbbb...2222"]["requests"], 0)
+
+
+class ConditionalRequestTest(FakeGitHubTestCase):
+    async def test_304_after_eviction_uses_the_body_it_revalidated(self):
+        analyzer = self.analyzer(conditional_cache={"enabled": True})
+        first = await analyzer.get_user_profile("octo")
+
+        # Evict everything once the request is queued, i.e. after its validators were attached
+        acquire = analyzer.scheduler.acquire
+
+        async def acquire_then_evict(*args, **kwargs):
+            analyzer.conditional_cache.entries.clear()
+            analyzer.conditional_cache.total_bytes = 0
+            await acquire(*args, **kwargs)
+
+        analyzer.scheduler.acquire = acquire_then_evict
+        second = await analyzer.get_user_profile("octo")
+
+        self.assertEqual(second, first)
+        self.assertGreaterEqual(analyzer.conditional_cache.stats()["responses_304"], 1)
+
+
+class IncrementalRefreshTest(FakeGitHubTestCase):
+    async def test_incremental_refresh_matches_full_fetch(self):
+        analyzer = self.analyzer(incremental={"enabled": True, "page_size": 2})
+        await analyzer.get_user_profile("octo")
+
+        # One repo changes language and stars, one is added, and more events arrive
+        # than fit in a short page (so the event window is re-fetched in full)
+        changed = next(repo for repo in self.github.repos if repo["name"] == "cli")
+        changed.update(language="Rust", stargazers_count=30, updated_at="2026-10-02T00:00:00Z")
+        self.github.repos.append(rest_repo({**REPOS[0], "name": "new-service", "language": "Go"}, 1))
+        self.github.repos[-1]["updated_at"] = "2026-10-03T00:00:00Z"
+        for event_type in ("PushEvent", "IssuesEvent", "PushEvent"):
+            self.github.add_event(event_type)
+
+        incremental = await analyzer.get_user_profile("octo")
+        full = await self.analyzer().get_user_profile("octo")
+        self.assertEqual(analyzer.refresh_stats, {"full": 1, "incremental": 1})
+        self.assertEqual(incremental, full)
+
+        # A single new event is prepended to the snapshot's events
+        self.github.add_event("PullRequestEvent")
+        incremental = await analyzer.get_user_profile("octo")
+        full = await self.analyzer().get_user_profile("octo")
+        self.assertEqual(analyzer.refresh_stats, {"full": 1, "incremental": 2})
+        self.assertEqual(incremental, full)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+SingleFlight coalescing and cancellation, for awaited calls and shared streams.
+
+Run from the agent directory:
+    python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import SingleFlight  # noqa: E402
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.flight = SingleFlight()
+        self.release = asyncio.Event()
+        self.started = 0
+        self.cancelled = 0
+
+    async def work(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+            return "result"
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    async def test_concurrent_calls_share_one_task(self):
+        callers = [asyncio.create_task(self.flight.do("key", self.work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(*callers), ["result"] * 3)
+        self.assertEqual(self.started, 1)
+        self.assertEqual(self.flight.stats(), {"in_flight": 0, "leaders": 1, "coalesced": 2})
+
+        await self.flight.do("key", self.work)
+        self.assertEqual(self.flight.stats(), {"in_flight": 0, "leaders": 2, "coalesced": 2})
+
+    async def test_cancelling_one_waiter_keeps_the_task_for_the_other(self):
+        first = asyncio.create_task(self.flight.do("key", self.work))
+        second = asyncio.create_task(self.flight.do("key", self.work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        self.assertIn("key", self.flight.calls)
+        self.release.set()
+
+        self.assertEqual(await second, "result")
+        self.assertEqual((self.started, self.cancelled), (1, 0))
+
+    async def test_cancelling_the_last_waiter_cancels_the_task(self):
+        caller = asyncio.create_task(self.flight.do("key", self.work))
+        await asyncio.sleep(0)
+        task = self.flight.calls["key"][0]
+
+        caller.cancel()
+        await asyncio.gather(caller, task, return_exceptions=True)
+
+        self.assertTrue(task.cancelled())
+        self.assertEqual(self.cancelled, 1)
+        self.assertNotIn("key", self.flight.calls)
+        # The next caller starts afresh rather than joining the cancelled task
+        self.release.set()
+        self.assertEqual(await self.flight.do("key", self.work), "result")
+        self.assertEqual(self.started, 2)
+
+
+class SharedStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.flight = SingleFlight()
+        self.step = asyncio.Event()
+        self.started = 0
+        self.closed = 0
+
+    async def produce(self):
+        self.started += 1
+        try:
+            for item in range(3):
+                await self.step.wait()
+                self.step.clear()
+                yield item
+        finally:
+            self.closed += 1
+
+    async def read(self, limit=None):
+        items = []
+        async for item in self.flight.stream("key", self.produce):
+            items.append(item)
+            if len(items) == limit:
+                break
+        return items
+
+    async def advance(self):
+        self.step.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_readers_share_one_producer_and_late_readers_replay(self):
+        first = asyncio.create_task(self.read())
+        await asyncio.sleep(0)
+        await self.advance()
+        late = asyncio.create_task(self.read())
+        await self.advance()
+        await self.advance()
+
+        self.assertEqual(await first, [0, 1, 2])
+        self.assertEqual(await late, [0, 1, 2])
+        self.assertEqual(self.started, 1)
+        self.assertEqual(self.flight.stats(), {"in_flight": 0, "leaders": 1, "coalesced": 1})
+
+    async def test_a_reader_leaving_keeps_the_producer_for_the_others(self):
+        leaving = asyncio.create_task(self.read(limit=1))
+        staying = asyncio.create_task(self.read())
+        await asyncio.sleep(0)
+        await self.advance()
+        self.assertEqual(await leaving, [0])
+        await self.advance()
+        await self.advance()
+
+        self.assertEqual(await staying, [0, 1, 2])
+        self.assertEqual(self.started, 1)
+
+    async def test_last_reader_leaving_cancels_the_producer(self):
+        reader = asyncio.create_task(self.read())
+        await asyncio.sleep(0)
+        broadcast = self.flight.streams["key"]
+
+        reader.cancel()
+        await asyncio.gather(reader, broadcast.task, return_exceptions=True)
+
+        self.assertTrue(broadcast.task.cancelled())
+        self.assertEqual(self.closed, 1)
+        self.assertNotIn("key", self.flight.streams)
+
+
+if __name__ == "__main__":
+    unittest.main()
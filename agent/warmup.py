@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Cache warm-up for Hacksy
+Pre-populates the profile and recommendation caches for a list of GitHub users
+(e.g. hackathon attendees) so their first live requests are cache hits.
+
+Only persistent cache tiers outlive this process, so configure sqlite_path (or
+shared_path) for the profile and recommendation caches in agents.yaml before
+warming up; the script refuses to run without them unless --allow-ephemeral.
+
+Usage:
+    python warmup.py attendees.txt --concurrency 4 --reserve 500
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Set
+
+from main import PRIORITY_BACKGROUND, agent_service
+
+logger = logging.getLogger("warmup")
+
+
+def read_usernames(path: str) -> List[str]:
+    """Read one username per line, skipping blanks, comments and duplicates"""
+    usernames = {}
+    with open(path, 'r') as f:
+        for line in f:
+            username = line.strip().lstrip('@')
+            if username and not username.startswith('#'):
+                # GitHub usernames are case-insensitive
+                usernames.setdefault(username.lower(), username)
+    return list(usernames.values())
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Usernames already warmed successfully by a previous run"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('success'):
+                done.add(record['username'].lower())
+    return done
+
+
+async def warm_up(usernames: List[str], agent: str, concurrency: int, reserve: int,
+                  checkpoint_path: str) -> Dict[str, int]:
+    """Analyze every user through AgentService with bounded concurrency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    scheduler = agent_service.github_analyzer.scheduler
+    summary = {"warmed": 0, "failed": 0, "skipped_for_quota": 0}
+
+    with open(checkpoint_path, 'a') as checkpoint:
+        async def warm(username: str):
+            async with semaphore:
+                # Leave headroom in the GitHub quota for live traffic
+                if scheduler.remaining is not None and scheduler.remaining < reserve:
+                    summary["skipped_for_quota"] += 1
+                    return
+                started = time.monotonic()
+                # Expired entries must be regenerated now, not in a background refresh that shutdown cancels
+                response = await agent_service.analyze_github_profile(username, agent, priority=PRIORITY_BACKGROUND,
+                                                                      allow_stale=False)
+                elapsed = time.monotonic() - started
+                if response.success:
+                    summary["warmed"] += 1
+                    logger.info(f"Warmed {username} in {elapsed:.1f}s")
+                else:
+                    summary["failed"] += 1
+                    logger.warning(f"Failed to warm {username}: {response.error}")
+                checkpoint.write(json.dumps({"username": username, "success": response.success}) + "\n")
+                checkpoint.flush()
+
+        await asyncio.gather(*(warm(username) for username in usernames))
+    return summary
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Pre-populate Hacksy caches for a list of GitHub usernames")
+    parser.add_argument("usernames_file", help="file with one GitHub username per line")
+    parser.add_argument("--agent", default="hackathon_recommender", help="agent to generate recommendations with")
+    parser.add_argument("--concurrency", type=int, default=4, help="analyses running at once")
+    parser.add_argument("--reserve", type=int, default=500,
+                        help="stop starting analyses once GitHub quota falls below this many requests")
+    parser.add_argument("--checkpoint", help="progress file (default: <usernames_file>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--allow-ephemeral", action="store_true",
+                        help="run even if a cache has no persistent tier (entries are lost on exit)")
+    args = parser.parse_args()
+
+    if agent_service.profile_cache.persistent is None or agent_service.recommendation_cache.persistent is None:
+        if not args.allow_ephemeral:
+            parser.error("the profile and recommendation caches both need sqlite_path or shared_path in agents.yaml; "
+                         "otherwise everything warmed is lost when this process exits (override with --allow-ephemeral)")
+        logger.warning("A cache has no persistent tier; its warm entries will be lost when this process exits")
+
+    checkpoint_path = args.checkpoint or f"{args.usernames_file}.checkpoint"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    usernames = read_usernames(args.usernames_file)
+    done = load_checkpoint(checkpoint_path)
+    pending = [username for username in usernames if username.lower() not in done]
+    logger.info(f"{len(usernames)} usernames, {len(usernames) - len(pending)} already warm, {len(pending)} to go")
+
+    await agent_service.startup()
+    started = time.monotonic()
+    try:
+        summary = await warm_up(pending, args.agent, args.concurrency, args.reserve, checkpoint_path)
+    finally:
+        await agent_service.shutdown()
+    elapsed = time.monotonic() - started
+
+    processed = summary["warmed"] + summary["failed"]
+    logger.info(
+        f"Warm-up finished in {elapsed:.1f}s: {summary['warmed']} warmed, {summary['failed']} failed, "
+        f"{summary['skipped_for_quota']} skipped to preserve quota, "
+        f"{len(usernames) - len(pending)} already warm ({processed / elapsed if elapsed else 0:.2f} users/s)"
+    )
+    logger.info(f"Coalescing: {agent_service.single_flight.stats()}, GitHub: {agent_service.github_analyzer.scheduler.stats()}, "
+                f"LLM: {agent_service.ai_client.admission.stats()}, "
+                f"Prompts: {agent_service.ai_client.prompt_builder.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())